@@ -1,27 +1,232 @@
-from flask import Flask, request, jsonify, render_template
-import requests
+from flask import Flask, request, jsonify, render_template, g, Response
+import logging
+import os
 import sqlite3
 from datetime import datetime, timedelta, timezone
 import json
-import defeatbeta_api
-from defeatbeta_api.data.ticker import Ticker
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+import numpy as np
 import pandas as pd
+import click
+
+from export import csv_chunks, parquet_chunks, pq
+from fanout import run_fanout, iter_fanout
+from http_cache import (price_etag, bar_last_modified, price_max_age, not_modified, set_cache_headers,
+                        compress_response, latest_session, next_close, session_close)
+from indicators import IndicatorCache, FAMILIES
+from metrics import Registry
+from price_cache import PriceCache
+from portfolio import parse_transactions, replay_holdings, value_series
+from price_columns import price_columns, returns_columns, columns_to_rows, format_dates, float_values
+from price_store import PriceStore, SAFE_TICKER
+from risk import aligned_closes, close_series, daily_returns_matrix, risk_matrix, betas, rolling_betas
+from shared_cache import SharedCache, encode_frame, decode_frame
+from singleflight import SingleFlight
+from statements import IndexedStatement, StatementCache
+from symbols import SymbolIndex, refresh_symbols
+from tiingo_client import TiingoClient
 
 app = Flask(__name__, static_folder='static', static_url_path='/static')
 
+logging.basicConfig(
+    level=os.environ.get("LOG_LEVEL", "INFO").upper(),
+    format="%(asctime)s level=%(levelname)s logger=%(name)s %(message)s"
+)
+logger = logging.getLogger("stocklookup")
+
+# -----------------------------------------------------------
+# Metrics: per-stage and per-endpoint latency histograms for /metrics
+# -----------------------------------------------------------
+
+# Each gunicorn worker writes its totals to METRICS_PATH and /metrics sums
+# them, so whichever worker a scrape lands on reports the whole node
+METRICS_PATH = "metrics.db"
+METRICS_FLUSH_SECONDS = 5
+
+metrics = Registry(METRICS_PATH, flush_seconds=METRICS_FLUSH_SECONDS)
+stage_seconds = metrics.histogram(
+    "stocklookup_stage_duration_seconds",
+    "Time spent in each upstream call and pipeline stage.",
+    "stage"
+)
+request_seconds = metrics.histogram(
+    "stocklookup_request_duration_seconds",
+    "End-to-end request latency per endpoint.",
+    "endpoint"
+)
+upstream_calls = metrics.counter(
+    "stocklookup_upstream_calls_total",
+    "Upstream fetches actually started, per source.",
+    "source"
+)
+coalesced_calls = metrics.counter(
+    "stocklookup_coalesced_calls_total",
+    "Calls that shared an identical in-flight fetch instead of starting their own.",
+    "source"
+)
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def record_request_duration(response):
+    started = g.pop("request_started", None)
+    if started is not None and request.endpoint not in (None, "static", "prometheus_metrics"):
+        request_seconds.observe(request.endpoint, time.perf_counter() - started)
+    return response
+
+@app.after_request
+def compress_json(response):
+    return compress_response(response, request.accept_encodings, COMPRESS_MIN_BYTES)
+
+@app.route('/metrics')
+def prometheus_metrics():
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
 #TODO: PUT YOUR TIINGO KEY HERE
 TIINGO_API_KEY = "YourApiKey"
 TIINGO_BASE_META = "https://api.tiingo.com/tiingo/daily/"
 TIINGO_BASE_IEX = "https://api.tiingo.com/iex/"
 
+# Local Tiingo quota (defaults match the free plan; raise them for paid plans)
+TIINGO_REQUESTS_PER_HOUR = 50
+TIINGO_REQUESTS_PER_DAY = 1000
+TIINGO_CONNECT_TIMEOUT_SECONDS = 3.05
+TIINGO_MAX_RETRIES = 2
+# The quota buckets live in this SQLite file so every worker process on the
+# node draws from the same account quota (None: separate buckets per process)
+TIINGO_QUOTA_PATH = "tiingo_quota.db"
+
 DB_NAME = "search_history.db"
+DB_BUSY_TIMEOUT_SECONDS = 10
+
+# /history page size, and retention applied by "flask --app app compact-history"
+HISTORY_DEFAULT_LIMIT = 100
+HISTORY_MAX_LIMIT = 500
+SEARCH_HISTORY_RETENTION_DAYS = 90
+SEARCH_HISTORY_PAYLOADS_PER_TICKER = 1
+
+# Price history cache shared by /search, /historical, /returns and /beta
+PRICE_CACHE_TTL_SECONDS = 15 * 60
+PRICE_CACHE_MAX_ENTRIES = 256
+PRICE_CACHE_MAX_BYTES = 256 * 1024 * 1024
+PRICE_CACHE_PINNED = ("SPY",)
+
+# Node-wide cache shared by all gunicorn workers: price frames and /search
+# payloads loaded by one worker are hits for the others
+SHARED_CACHE_ENABLED = True
+SHARED_CACHE_PATH = "shared_cache.db"
+SHARED_CACHE_MAX_BYTES = 512 * 1024 * 1024
+
+# Income statements change once a quarter: keep them for a week, or until the
+# next report is due, then re-check every few hours during earnings season
+STATEMENT_CACHE_TTL_SECONDS = 7 * 24 * 60 * 60
+STATEMENT_CACHE_EARNINGS_TTL_SECONDS = 6 * 60 * 60
+STATEMENT_CACHE_MAX_ENTRIES = 1024
+
+# Local symbol universe for /symbols typeahead and ticker validation. The
+# bundled file is a seed list; "flask refresh-symbols" writes the full one,
+# and only the full list rejects well-formed but unknown tickers.
+SYMBOLS_PATH = "symbols.csv"
+SYMBOLS_MAX_LIMIT = 50
+
+# On-disk price history; stale tickers append only the bars they are missing
+PRICE_STORE_DIR = "price_store"
+PRICE_STORE_MAX_AGE_SECONDS = 6 * 60 * 60
+
+# /search fetches its upstream sources concurrently; each source gets its own
+# deadline and degrades to null fields when it is slow or fails
+SEARCH_FANOUT_ENABLED = True
+SEARCH_FANOUT_MAX_WORKERS = 32
+SEARCH_SOURCE_TIMEOUT_SECONDS = 10
+SEARCH_SOURCE_TIMEOUTS = {
+    "meta": 5,
+    "iex": 5,
+    "fundamentals": 5,
+    "summary": 8,
+    "info": 8,
+    "quote": 10,
+    "quarterly_income": 10,
+    "annual_income": 10
+}
+
+# A source that misses its deadline keeps running in the background, so
+# DefeatBeta's DuckDB reads get hard HTTP bounds (its defaults allow 120s and
+# five retries per request), and a call in flight longer than
+# FLIGHT_MAX_AGE_SECONDS is no longer joined by later callers
+DEFEATBETA_HTTP_TIMEOUT_SECONDS = 15
+DEFEATBETA_HTTP_RETRIES = 1
+FLIGHT_MAX_AGE_SECONDS = 60
+
+# Number of most recent bars each period covers in /historical, /returns and /beta
+PERIOD_DAYS = {
+    "1d": 1, "5d": 5, "1mo": 30, "3mo": 90, "6mo": 180,
+    "1y": 365, "2y": 730, "5y": 1825, "10y": 3650, "ytd": 365, "max": 3650
+}
+
+# /search/batch runs whole-ticker lookups concurrently on top of the fan-out
+BATCH_MAX_TICKERS = 50
+BATCH_MAX_WORKERS = 4
+
+# /indicators: moving-average/volatility window bounds and cached series
+INDICATORS_DEFAULT_WINDOW = 20
+INDICATORS_MAX_WINDOW = 250
+INDICATOR_CACHE_MAX_ENTRIES = 256
+
+# /export streams bars ticker by ticker, this many rows per chunk
+EXPORT_MAX_TICKERS = 500
+EXPORT_CHUNK_ROWS = 5000
+
+# /historical and /returns are cacheable until the next market close once the
+# latest session's bar is stored; until then browsers revalidate this often
+HTTP_CACHE_PENDING_MAX_AGE = 15 * 60
+
+# JSON responses at least this large are sent gzip (or brotli) encoded
+COMPRESS_MIN_BYTES = 1024
+
+# Returns, volatility, beta and correlation for every PERIOD_DAYS key are
+# precomputed after each close ("flask materialize-analytics") for SPY, these
+# tickers, tickers on polled watchlists and the most searched ones of the
+# warm-up lookback; /returns and /beta answer from them while they cover the latest bar
+ANALYTICS_ENABLED = True
+ANALYTICS_BENCHMARK = "SPY"
+ANALYTICS_TICKERS = ()
+ANALYTICS_RUN_DELAY_SECONDS = 2 * 60 * 60
+
+# /portfolio/valuation request size limit
+PORTFOLIO_MAX_TRANSACTIONS = 5000
+
+# /search answers from the latest SearchHistory snapshot inside the freshness
+# window, and serves older snapshots (up to the max) while refreshing them in
+# the background. ?refresh=1 always does a full lookup.
+SEARCH_SNAPSHOT_ENABLED = True
+SEARCH_SNAPSHOT_FRESH_SECONDS = 5 * 60
+SEARCH_SNAPSHOT_MAX_STALE_SECONDS = 24 * 60 * 60
+SNAPSHOT_REFRESH_MAX_WORKERS = 2
+
+# Once a worker is serving, import DefeatBeta and load price history for SPY,
+# watchlist tickers and the most searched tickers of the last few days in the
+# background so early requests are warm
+WARMUP_ENABLED = True
+WARMUP_TICKERS = ("SPY",)
+WARMUP_TOP_SEARCHED = 20
+WARMUP_LOOKBACK_DAYS = 7
 
 # -----------------------------------------------------------
-# Initialization: Create database and table if not exists
+# Initialization: Create database and table if not exists. Runs once per
+# deploy (gunicorn.conf.py, "flask init-db" or python app.py), not per import.
 # -----------------------------------------------------------
 
 def init_db():
     with sqlite3.connect(DB_NAME) as conn:
+        # WAL lets readers proceed while a worker is writing; it is stored in
+        # the database file, so it only needs to be set once
+        conn.execute('PRAGMA journal_mode=WAL')
+
         # Check if the table exists
         cursor = conn.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='SearchHistory'")
         table_exists = cursor.fetchone() is not None
@@ -54,7 +259,320 @@ def init_db():
                     WHERE api_timestamp IS NULL
                 ''')
 
-init_db()
+        # Indexes for /history pagination and per-ticker snapshot lookups
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_search_history_timestamp ON SearchHistory (timestamp)')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_search_history_ticker_timestamp ON SearchHistory (ticker, timestamp)')
+
+        # Tickers on client watchlists, from their /search/batch?watch=1 polls
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS WatchedTickers (
+                ticker TEXT PRIMARY KEY,
+                polled_at DATETIME NOT NULL
+            )
+        ''')
+
+        # Precomputed /returns and /beta results, one row per ticker and period
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS AnalyticsSnapshot (
+                ticker TEXT NOT NULL,
+                period TEXT NOT NULL,
+                benchmark TEXT NOT NULL,
+                computed_at DATETIME NOT NULL,
+                last_bar TEXT NOT NULL,
+                total_bars INTEGER NOT NULL,
+                beta REAL,
+                correlation REAL,
+                volatility REAL,
+                benchmark_volatility REAL,
+                returns_json TEXT,
+                PRIMARY KEY (ticker, period)
+            )
+        ''')
+
+@app.cli.command("init-db")
+def init_db_command():
+    """Create or migrate the SearchHistory schema."""
+    init_db()
+    logger.info("database initialized path=%s", DB_NAME)
+
+# -----------------------------------------------------------
+# Database connections: one reused connection per worker thread
+# -----------------------------------------------------------
+
+db_local = threading.local()
+
+def get_db():
+    # Use as "with get_db() as conn:" to commit (or roll back) on exit
+    conn = getattr(db_local, "conn", None)
+    if conn is None:
+        conn = sqlite3.connect(DB_NAME, timeout=DB_BUSY_TIMEOUT_SECONDS)
+        conn.row_factory = sqlite3.Row
+        conn.execute('PRAGMA synchronous=NORMAL')
+        db_local.conn = conn
+    return conn
+
+def compact_search_history(conn, retention_days, payloads_per_ticker):
+    # Drop rows past the retention window, then keep full payloads only on
+    # the most recent rows of each ticker; older rows keep ticker/timestamps.
+    cutoff = (datetime.now(timezone.utc) - timedelta(days=retention_days)).isoformat()
+    deleted = conn.execute('DELETE FROM SearchHistory WHERE timestamp < ?', (cutoff,)).rowcount
+    compacted = conn.execute('''
+        UPDATE SearchHistory
+        SET company_json = NULL, stock_json = NULL
+        WHERE id IN (
+            SELECT id FROM (
+                SELECT id, ROW_NUMBER() OVER (PARTITION BY ticker ORDER BY timestamp DESC) AS rn
+                FROM SearchHistory
+                WHERE company_json IS NOT NULL
+            )
+            WHERE rn > ?
+        )
+    ''', (payloads_per_ticker,)).rowcount
+    return deleted, compacted
+
+@app.cli.command("compact-history")
+def compact_history_command():
+    """Apply SearchHistory retention and drop duplicate old payloads."""
+    with get_db() as conn:
+        deleted, compacted = compact_search_history(
+            conn, SEARCH_HISTORY_RETENTION_DAYS, SEARCH_HISTORY_PAYLOADS_PER_TICKER)
+    conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+    conn.execute('VACUUM')
+    logger.info("history compacted deleted=%d compacted=%d retention_days=%d",
+                deleted, compacted, SEARCH_HISTORY_RETENTION_DAYS)
+
+# -----------------------------------------------------------
+# Single-flight: concurrent fetches of the same (source, ticker) share one call
+# -----------------------------------------------------------
+
+def count_flight(source, coalesced):
+    (coalesced_calls if coalesced else upstream_calls).inc(source)
+
+flights = SingleFlight(on_call=count_flight, max_age=FLIGHT_MAX_AGE_SECONDS)
+
+# -----------------------------------------------------------
+# Price history: one DefeatBeta price() fetch per ticker, shared by all routes
+# -----------------------------------------------------------
+
+defeatbeta_config = None
+
+def import_defeatbeta():
+    # DefeatBeta's Ticker pulls in duckdb and its API clients (seconds of
+    # import time). Each worker's warm-up imports it right after the fork,
+    # keeping it out of app.py's import (and every flask CLI command), and
+    # anything that needs it before then imports it on first use.
+    from defeatbeta_api.client.duckdb_conf import Configuration
+    from defeatbeta_api.data.ticker import Ticker as DefeatBetaTicker
+    return Configuration, DefeatBetaTicker
+
+def Ticker(ticker):
+    global defeatbeta_config
+    Configuration, DefeatBetaTicker = import_defeatbeta()
+    if defeatbeta_config is None:
+        # Clients are shared per configuration value, so a racing duplicate is harmless
+        defeatbeta_config = Configuration(
+            duckdb_http_timeout_seconds=DEFEATBETA_HTTP_TIMEOUT_SECONDS,
+            duckdb_http_retries=DEFEATBETA_HTTP_RETRIES,
+            cache_http_timeout_seconds=DEFEATBETA_HTTP_TIMEOUT_SECONDS
+        )
+    return DefeatBetaTicker(ticker, config=defeatbeta_config)
+
+def fetch_price_history(ticker):
+    return Ticker(ticker).price()
+
+def fetch_price_history_since(ticker, last_date):
+    # Only the bars from last_date on (the store compares the overlapping bar
+    # to catch revisions); DuckDB pushes the date filter down to the parquet
+    # scan instead of downloading the full history again.
+    from defeatbeta_api.utils.const import stock_prices
+
+    defeat_stock = Ticker(ticker)
+    if not SAFE_TICKER.fullmatch(ticker):
+        return defeat_stock.price()
+    try:
+        url = defeat_stock.huggingface_client.get_url_path(stock_prices)
+        return defeat_stock.duckdb_client.query(
+            f"SELECT * FROM '{url}' WHERE symbol = '{ticker}' "
+            f"AND report_date >= '{last_date.strftime('%Y-%m-%d')}'"
+        )
+    except Exception as e:
+        logger.warning("incremental price fetch failed ticker=%s error=%r; fetching full history", ticker, e)
+        return defeat_stock.price()
+
+price_store = PriceStore(
+    PRICE_STORE_DIR,
+    fetch_price_history,
+    fetch_price_history_since,
+    max_age_seconds=PRICE_STORE_MAX_AGE_SECONDS
+)
+
+shared_cache = SharedCache(SHARED_CACHE_PATH, max_bytes=SHARED_CACHE_MAX_BYTES) if SHARED_CACHE_ENABLED else None
+
+def load_price_data(ticker):
+    # Another worker may already have loaded this frame
+    if shared_cache is not None:
+        data = shared_cache.get(f"price:{ticker}")
+        if data is not None:
+            return decode_frame(data)
+
+    with stage_seconds.time("price_load"):
+        frame = price_store.load(ticker)
+
+    if shared_cache is not None:
+        shared_cache.put(f"price:{ticker}", encode_frame(frame), PRICE_CACHE_TTL_SECONDS)
+    return frame
+
+def load_price_data_once(ticker):
+    # Concurrent cache misses for one ticker wait on a single store load
+    return flights.do(("price", ticker.upper()), load_price_data, ticker)
+
+price_cache = PriceCache(
+    load_price_data_once,
+    ttl_seconds=PRICE_CACHE_TTL_SECONDS,
+    max_entries=PRICE_CACHE_MAX_ENTRIES,
+    max_bytes=PRICE_CACHE_MAX_BYTES,
+    pinned=PRICE_CACHE_PINNED
+)
+
+def get_price_data(ticker, start=None, end=None, last=None):
+    # Date-range reads go straight to the store's sorted date index. Period
+    # windows (the last N bars) use the in-memory frame when it is already
+    # loaded and otherwise read only those rows from the store. Everything
+    # else shares the in-memory frame for the ticker.
+    if start is not None or end is not None:
+        return flights.do(("price_range", ticker.upper(), start, end), price_store.load, ticker, start=start, end=end)
+    if last is not None:
+        frame = price_cache.peek(ticker)
+        if frame is not None:
+            return frame.tail(last)
+        return flights.do(("price_last", ticker.upper(), last), price_store.load, ticker, last=last)
+    return price_cache.get(ticker)
+
+def parse_ticker_list(raw):
+    # Comma-separated symbols, upper-cased and deduped in request order
+    return list(dict.fromkeys(t.upper().strip() for t in raw.split(",") if t.strip()))
+
+def price_validators(price_data):
+    return bar_validators(price_data["report_date"].iloc[-1], len(price_data))
+
+def bar_validators(last_bar, total_bars):
+    # These responses depend only on the request and the stored bars, so the
+    # request path plus the last bar (and bar count) identify the content
+    etag = price_etag(request.full_path, last_bar, total_bars)
+    return etag, bar_last_modified(last_bar), price_max_age(last_bar, HTTP_CACHE_PENDING_MAX_AGE)
+
+symbol_index = None
+symbol_index_lock = threading.Lock()
+
+def get_symbol_index():
+    global symbol_index
+    with symbol_index_lock:
+        if symbol_index is None:
+            symbol_index = SymbolIndex.load(SYMBOLS_PATH)
+        return symbol_index
+
+def symbol_problem(ticker):
+    # (message, status) for a malformed or unknown symbol, else None
+    if not SAFE_TICKER.fullmatch(ticker):
+        return "Invalid ticker symbol", 400
+    index = get_symbol_index()
+    if index.complete and ticker not in index:
+        return "No record has been found, please enter a valid symbol.", 404
+    return None
+
+def symbol_error(ticker):
+    # Reject malformed or unknown symbols before any upstream call
+    problem = symbol_problem(ticker)
+    if problem is None:
+        return None
+    message, status = problem
+    return jsonify({"error": message}), status
+
+@app.cli.command("refresh-symbols")
+def refresh_symbols_command():
+    """Rebuild the local symbol universe from Tiingo's supported tickers."""
+    global symbol_index
+    count = refresh_symbols(SYMBOLS_PATH)
+    with symbol_index_lock:
+        symbol_index = None
+    logger.info("symbols refreshed path=%s symbols=%d", SYMBOLS_PATH, count)
+
+def valid_date_args(*values):
+    # Absent is fine; empty strings parse to NaT, so they are rejected too
+    for value in values:
+        if value is None:
+            continue
+        try:
+            if pd.isna(pd.Timestamp(value)):
+                return False
+        except (TypeError, ValueError):
+            return False
+    return True
+
+# -----------------------------------------------------------
+# Warm-up: prefetch hot tickers' price history in the background
+# -----------------------------------------------------------
+
+warmup_started = False
+warmup_lock = threading.Lock()
+
+def hot_tickers(pinned):
+    # The pinned tickers, then watchlist tickers and the most searched ones of
+    # the lookback window
+    cutoff = (datetime.now(timezone.utc) - timedelta(days=WARMUP_LOOKBACK_DAYS)).isoformat()
+    with get_db() as conn:
+        watched = conn.execute(
+            'SELECT ticker FROM WatchedTickers WHERE polled_at >= ? ORDER BY polled_at DESC', (cutoff,)
+        ).fetchall()
+        searched = conn.execute('''
+            SELECT ticker FROM SearchHistory
+            WHERE timestamp >= ?
+            GROUP BY ticker
+            ORDER BY COUNT(*) DESC
+            LIMIT ?
+        ''', (cutoff, WARMUP_TOP_SEARCHED)).fetchall()
+    return list(dict.fromkeys([*pinned, *(row["ticker"] for row in watched), *(row["ticker"] for row in searched)]))
+
+def run_warmup():
+    started = time.perf_counter()
+    # Price loads below skip DefeatBeta while the store is fresh, so import
+    # it explicitly; otherwise the first search after a deploy pays for it
+    try:
+        import_defeatbeta()
+        logger.info("warm-up imported defeatbeta seconds=%.2f", time.perf_counter() - started)
+    except Exception as e:
+        logger.warning("warm-up could not import defeatbeta error=%r", e)
+
+    try:
+        tickers = hot_tickers(WARMUP_TICKERS)
+    except sqlite3.Error:
+        logger.exception("warm-up could not read search history")
+        tickers = list(WARMUP_TICKERS)
+
+    warmed = 0
+    for ticker in tickers:
+        try:
+            price_cache.get(ticker)
+            warmed += 1
+        except Exception as e:
+            logger.warning("warm-up failed ticker=%s error=%r", ticker, e)
+    logger.info("warm-up done tickers=%d warmed=%d seconds=%.2f",
+                len(tickers), warmed, time.perf_counter() - started)
+
+def start_warmup():
+    # At most once per worker process; called by gunicorn's post_worker_init
+    # hook, or by the first request under the development server
+    global warmup_started
+    with warmup_lock:
+        if warmup_started or not WARMUP_ENABLED:
+            return
+        warmup_started = True
+    threading.Thread(target=run_warmup, name="warmup", daemon=True).start()
+
+@app.before_request
+def start_warmup_on_first_request():
+    if not warmup_started:
+        start_warmup()
 
 # -----------------------------------------------------------
 # Route: Home page
@@ -64,6 +582,398 @@ init_db()
 def index():
     return render_template("index.html")
 
+# -----------------------------------------------------------
+# Search sources: each fetches one upstream section independently
+# -----------------------------------------------------------
+
+tiingo = TiingoClient(
+    TIINGO_API_KEY,
+    requests_per_hour=TIINGO_REQUESTS_PER_HOUR,
+    requests_per_day=TIINGO_REQUESTS_PER_DAY,
+    connect_timeout=TIINGO_CONNECT_TIMEOUT_SECONDS,
+    max_retries=TIINGO_MAX_RETRIES,
+    pool_size=SEARCH_FANOUT_MAX_WORKERS,
+    quota_path=TIINGO_QUOTA_PATH
+)
+
+def fetch_tiingo_meta(ticker):
+    meta_url = f"{TIINGO_BASE_META}{ticker}"
+    meta_resp = tiingo.get(meta_url, read_timeout=SEARCH_SOURCE_TIMEOUTS["meta"])
+    logger.debug("tiingo meta ticker=%s status=%d", ticker, meta_resp.status_code)
+
+    if meta_resp.status_code != 200:
+        return None
+    return meta_resp.json()
+
+def fetch_tiingo_iex(ticker):
+    iex_url = f"{TIINGO_BASE_IEX}{ticker}"
+    iex_resp = tiingo.get(iex_url, read_timeout=SEARCH_SOURCE_TIMEOUTS["iex"])
+    logger.debug("tiingo iex ticker=%s status=%d", ticker, iex_resp.status_code)
+
+    if iex_resp.status_code == 200:
+        iex_data = iex_resp.json()
+        return iex_data[0] if isinstance(iex_data, list) and iex_data else {}
+    return {}
+
+def fetch_tiingo_fundamentals(ticker):
+    fundamentals_url = f"{TIINGO_BASE_META}{ticker}/fundamentals"
+    fundamentals_resp = tiingo.get(fundamentals_url, read_timeout=SEARCH_SOURCE_TIMEOUTS["fundamentals"])
+    logger.debug("tiingo fundamentals ticker=%s status=%d", ticker, fundamentals_resp.status_code)
+    if fundamentals_resp.status_code != 200:
+        return {}
+    fundamentals_data = fundamentals_resp.json()
+    if not fundamentals_data:
+        return {}
+
+    # Extract key financial metrics
+    latest_fundamentals = fundamentals_data[0] if isinstance(fundamentals_data, list) else fundamentals_data
+    return {
+        "revenue": latest_fundamentals.get("revenue"),
+        "netIncome": latest_fundamentals.get("netIncome"),
+        "eps": latest_fundamentals.get("eps"),
+        "dividendYield": latest_fundamentals.get("dividendYield"),
+        "peRatio": latest_fundamentals.get("peRatio"),
+        "pbRatio": latest_fundamentals.get("pbRatio"),
+        "debtToEquity": latest_fundamentals.get("debtToEquity"),
+        "roe": latest_fundamentals.get("roe"),
+        "marketCap": latest_fundamentals.get("marketCap")
+    }
+
+def fetch_defeatbeta_summary(ticker):
+    # Get comprehensive company summary data
+    summary_data = Ticker(ticker).summary()
+    if summary_data.empty:
+        return {}
+    summary_row = summary_data.iloc[0]
+    return {
+        "market_cap": float(summary_row['market_cap']) if not pd.isna(summary_row['market_cap']) else None,
+        "enterprise_value": float(summary_row['enterprise_value']) if not pd.isna(summary_row['enterprise_value']) else None,
+        "shares_outstanding": float(summary_row['shares_outstanding']) if not pd.isna(summary_row['shares_outstanding']) else None,
+        "beta": float(summary_row['beta']) if not pd.isna(summary_row['beta']) else None,
+        "trailing_pe": float(summary_row['trailing_pe']) if not pd.isna(summary_row['trailing_pe']) else None,
+        "forward_pe": float(summary_row['forward_pe']) if not pd.isna(summary_row['forward_pe']) else None,
+        "trailing_eps": float(summary_row['tailing_eps']) if not pd.isna(summary_row['tailing_eps']) else None,
+        "forward_eps": float(summary_row['forward_eps']) if not pd.isna(summary_row['forward_eps']) else None,
+        "currency": summary_row['currency'] if not pd.isna(summary_row['currency']) else None
+    }
+
+def fetch_defeatbeta_info(ticker):
+    # Get additional company information. Missing industry, sector and
+    # website fall back to the Tiingo values when the sections are merged.
+    company_info = Ticker(ticker).info()
+    if company_info is None or company_info.empty:
+        return {}
+    info_row = company_info.iloc[0]
+    return {
+        "industry": info_row.get('industry') if not pd.isna(info_row.get('industry')) else None,
+        "sector": info_row.get('sector') if not pd.isna(info_row.get('sector')) else None,
+        "full_time_employees": int(info_row.get('full_time_employees')) if not pd.isna(info_row.get('full_time_employees')) else None,
+        "website": info_row.get('web_site') if not pd.isna(info_row.get('web_site')) else None,
+        "long_business_summary": info_row.get('long_business_summary') if not pd.isna(info_row.get('long_business_summary')) else None,
+        "address": info_row.get('address') if not pd.isna(info_row.get('address')) else None,
+        "city": info_row.get('city') if not pd.isna(info_row.get('city')) else None,
+        "country": info_row.get('country') if not pd.isna(info_row.get('country')) else None,
+        "phone": info_row.get('phone') if not pd.isna(info_row.get('phone')) else None
+    }
+
+def fetch_defeatbeta_quote(ticker):
+    price_data = get_price_data(ticker)
+    if price_data.empty:
+        return {}
+
+    # Get the most recent price data (last close)
+    latest_price = price_data.iloc[-1]
+    # Get previous day's close for change calculation
+    if len(price_data) > 1:
+        prev_close = price_data.iloc[-2]['close']
+    else:
+        prev_close = latest_price['close']
+    return {
+        "last_close": float(latest_price['close']) if not pd.isna(latest_price['close']) else None,
+        "prevClose": float(prev_close) if not pd.isna(prev_close) else None,
+        "open": float(latest_price['open']) if not pd.isna(latest_price['open']) else None,
+        "high": float(latest_price['high']) if not pd.isna(latest_price['high']) else None,
+        "low": float(latest_price['low']) if not pd.isna(latest_price['low']) else None,
+        "volume": int(latest_price['volume']) if not pd.isna(latest_price['volume']) else None
+    }
+
+def load_income_statement(ticker, kind):
+    # Parsed and indexed once per cache lifetime, not on every search
+    defeat_stock = Ticker(ticker)
+    if kind == "quarterly":
+        income_stmt = defeat_stock.quarterly_income_statement()
+    else:
+        income_stmt = defeat_stock.annual_income_statement()
+    if income_stmt is None or not hasattr(income_stmt, 'data') or income_stmt.data.empty:
+        return None
+    return IndexedStatement(income_stmt.data)
+
+indicator_cache = IndicatorCache(max_entries=INDICATOR_CACHE_MAX_ENTRIES)
+
+statement_cache = StatementCache(
+    load_income_statement,
+    ttl_seconds=STATEMENT_CACHE_TTL_SECONDS,
+    earnings_ttl_seconds=STATEMENT_CACHE_EARNINGS_TTL_SECONDS,
+    max_entries=STATEMENT_CACHE_MAX_ENTRIES
+)
+
+def fetch_defeatbeta_quarterly_income(ticker):
+    income_stmt = statement_cache.get(ticker, "quarterly")
+    if income_stmt is None:
+        return {}
+
+    # Get TTM data from the income statement
+    return {
+        "revenue": income_stmt.ttm("Total Revenue"),
+        "netIncome": income_stmt.ttm("Net Income Common Stockholders"),
+        "eps": income_stmt.ttm("Diluted EPS")
+    }
+
+def fetch_defeatbeta_annual_income(ticker):
+    # Gross Profit and EBITDA from the latest annual income statement
+    income_stmt = statement_cache.get(ticker, "annual")
+    if income_stmt is None or not income_stmt.periods:
+        return {}
+
+    return {
+        "gross_profit": income_stmt.latest("Gross Profit"),
+        "ebitda": income_stmt.latest("EBITDA")
+    }
+
+SEARCH_SOURCES = {
+    "meta": fetch_tiingo_meta,
+    "iex": fetch_tiingo_iex,
+    "fundamentals": fetch_tiingo_fundamentals,
+    "summary": fetch_defeatbeta_summary,
+    "info": fetch_defeatbeta_info,
+    "quote": fetch_defeatbeta_quote,
+    "quarterly_income": fetch_defeatbeta_quarterly_income,
+    "annual_income": fetch_defeatbeta_annual_income
+}
+
+search_executor = (
+    ThreadPoolExecutor(max_workers=SEARCH_FANOUT_MAX_WORKERS, thread_name_prefix="search-source")
+    if SEARCH_FANOUT_ENABLED else None
+)
+
+batch_executor = ThreadPoolExecutor(max_workers=BATCH_MAX_WORKERS, thread_name_prefix="search-batch")
+
+def run_timed_source(name, source, ticker):
+    return flights.do((name, ticker), time_source, name, source, ticker)
+
+def time_source(name, source, ticker):
+    with stage_seconds.time(name):
+        return source(ticker)
+
+def fetch_search_sections(ticker):
+    tasks = {name: partial(run_timed_source, name, source, ticker) for name, source in SEARCH_SOURCES.items()}
+    return run_fanout(tasks, SEARCH_SOURCE_TIMEOUTS, SEARCH_SOURCE_TIMEOUT_SECONDS, executor=search_executor)
+
+def build_search_payload(sections):
+    # Merge in the same precedence the serial pipeline used: Tiingo first,
+    # then DefeatBeta sections overriding or filling in fields.
+    company_data = dict(sections.get("meta") or {})
+    stock_data = dict(sections.get("iex") or {})
+    stock_data.update(sections.get("fundamentals") or {})
+
+    company_data.update(sections.get("summary") or {})
+
+    info = dict(sections.get("info") or {})
+    for key in ("industry", "sector", "website"):
+        if key in info and info[key] is None:
+            info[key] = company_data.get(key)
+    company_data.update(info)
+
+    stock_data.update(sections.get("quote") or {})
+    stock_data.update(sections.get("quarterly_income") or {})
+
+    add_price_change(stock_data)
+
+    annual_income = sections.get("annual_income") or {}
+    stock_data['gross_profit'] = annual_income.get('gross_profit')
+    stock_data['ebitda'] = annual_income.get('ebitda')
+
+    return company_data, stock_data
+
+def add_price_change(stock_data):
+    # Compute change and change_percent if valid
+    last = stock_data.get("last_close")
+    prev_close = stock_data.get("prevClose")
+
+    if last is not None and prev_close is not None:
+        change = round(last - prev_close, 2)
+        change_percent = round((change / prev_close) * 100, 2)
+    else:
+        change = "N/A"
+        change_percent = "N/A"
+
+    stock_data["change"] = change
+    stock_data["change_percent"] = change_percent
+
+def missing_meta_error(failed):
+    # No Tiingo meta: either the upstream call failed or the symbol is unknown
+    if "meta" in failed:
+        return "Failed to fetch data from APIs.", 500
+    return "No record has been found, please enter a valid symbol.", 404
+
+def lookup_ticker(ticker):
+    # Returns (payload, None) on success or (None, (message, status)) on failure
+    sections, failed = fetch_search_sections(ticker)
+
+    if sections["meta"] is None:
+        return None, missing_meta_error(failed)
+
+    # Merge sections; failed or slow sources become null fields
+    company_data, stock_data = build_search_payload(sections)
+
+    # Get current timestamp for API call using timezone-aware datetime
+    api_timestamp = datetime.now(timezone.utc).isoformat()
+
+    return {
+        "company": company_data,
+        "stock": stock_data,
+        "api_timestamp": api_timestamp
+    }, None
+
+def lookup_ticker_shared(ticker, refresh=False):
+    # lookup_ticker() through the node-wide cache; refresh skips the read
+    # but still stores the new payload for the other workers. Returns
+    # (payload, error, fresh) where fresh means the upstream APIs were called.
+    key = f"search:{ticker}"
+    if shared_cache is not None and not refresh:
+        data = shared_cache.get(key)
+        if data is not None:
+            return json.loads(data), None, False
+
+    payload, error = lookup_ticker(ticker)
+    if error is None and shared_cache is not None:
+        shared_cache.put(key, payload_json(payload).encode(), SEARCH_SNAPSHOT_FRESH_SECONDS)
+    return payload, error, True
+
+def payload_json(value):
+    # numpy scalars from DefeatBeta frames are not JSON serializable as-is
+    return json.dumps(value, default=lambda o: o.item() if hasattr(o, "item") else str(o))
+
+def save_search_history(conn, ticker, payload, searched_at=None, store_payload=True):
+    # Searches answered from a snapshot only record when they happened; the
+    # payload already lives in the row the snapshot was read from.
+    conn.execute('''
+        INSERT INTO SearchHistory (ticker, company_json, stock_json, api_timestamp, timestamp)
+        VALUES (?, ?, ?, ?, ?)
+    ''', (
+        ticker,
+        payload_json(payload["company"]) if store_payload else None,
+        payload_json(payload["stock"]) if store_payload else None,
+        payload["api_timestamp"],
+        searched_at or payload["api_timestamp"]  # Fresh lookups use the API call time
+    ))
+
+def save_lookup_history(conn, ticker, payload, fresh):
+    # A fresh lookup is dated by its API call. A cached answer is dated now
+    # and only stores its payload if no row holds that payload yet (a batch
+    # with history=0 may have cached it without saving it).
+    if fresh:
+        save_search_history(conn, ticker, payload)
+        return
+    stored = conn.execute('''
+        SELECT 1 FROM SearchHistory
+        WHERE ticker = ? AND api_timestamp = ? AND company_json IS NOT NULL
+        LIMIT 1
+    ''', (ticker, payload["api_timestamp"])).fetchone() is not None
+    save_search_history(conn, ticker, payload,
+                        searched_at=datetime.now(timezone.utc).isoformat(),
+                        store_payload=not stored)
+
+# -----------------------------------------------------------
+# Search snapshots: serve /search from the latest SearchHistory payload
+# -----------------------------------------------------------
+
+def load_search_snapshot(ticker):
+    with get_db() as conn:
+        row = conn.execute('''
+            SELECT company_json, stock_json, api_timestamp
+            FROM SearchHistory
+            WHERE ticker = ? AND company_json IS NOT NULL
+            ORDER BY timestamp DESC
+            LIMIT 1
+        ''', (ticker,)).fetchone()
+
+    if row is None:
+        return None
+    try:
+        return {
+            "company": json.loads(row[0]),
+            "stock": json.loads(row[1]),
+            "api_timestamp": row[2]
+        }
+    except (TypeError, ValueError):
+        # Rows written before payloads were stored as JSON
+        return None
+
+def snapshot_age_seconds(snapshot):
+    api_time = datetime.fromisoformat(snapshot["api_timestamp"])
+    if api_time.tzinfo is None:
+        api_time = api_time.replace(tzinfo=timezone.utc)
+    return (datetime.now(timezone.utc) - api_time).total_seconds()
+
+snapshot_refresh_executor = ThreadPoolExecutor(max_workers=SNAPSHOT_REFRESH_MAX_WORKERS, thread_name_prefix="snapshot-refresh")
+snapshot_refreshing = set()
+snapshot_refreshing_lock = threading.Lock()
+
+def refresh_search_snapshot(ticker):
+    try:
+        payload, error, _ = lookup_ticker_shared(ticker, refresh=True)
+        if error is None:
+            with get_db() as conn:
+                save_search_history(conn, ticker, payload)
+            logger.info("snapshot refreshed ticker=%s", ticker)
+    except Exception:
+        logger.exception("snapshot refresh failed ticker=%s", ticker)
+    finally:
+        with snapshot_refreshing_lock:
+            snapshot_refreshing.discard(ticker)
+
+def schedule_snapshot_refresh(ticker):
+    # At most one background refresh per ticker at a time
+    with snapshot_refreshing_lock:
+        if ticker in snapshot_refreshing:
+            return
+        snapshot_refreshing.add(ticker)
+    snapshot_refresh_executor.submit(refresh_search_snapshot, ticker)
+
+def serve_search_snapshot(ticker):
+    # Returns (snapshot, "fresh" | "stale") or (None, None) when the caller
+    # has to do a full lookup.
+    snapshot = load_search_snapshot(ticker)
+    if snapshot is None:
+        return None, None
+
+    age = snapshot_age_seconds(snapshot)
+    if age <= SEARCH_SNAPSHOT_FRESH_SECONDS:
+        return snapshot, "fresh"
+    if age <= SEARCH_SNAPSHOT_MAX_STALE_SECONDS:
+        schedule_snapshot_refresh(ticker)
+        return snapshot, "stale"
+    return None, None
+
+# -----------------------------------------------------------
+# Route: Symbol typeahead - prefix lookups in the local symbol universe
+# -----------------------------------------------------------
+
+@app.route('/symbols')
+def symbols():
+    prefix = request.args.get("prefix", "").strip()
+    try:
+        limit = min(max(int(request.args.get("limit", 10)), 1), SYMBOLS_MAX_LIMIT)
+    except ValueError:
+        return jsonify({"error": "limit must be an integer"}), 400
+
+    matches = get_symbol_index().search(prefix, limit) if prefix else []
+    response = jsonify({"prefix": prefix, "symbols": matches})
+    response.cache_control.public = True
+    response.cache_control.max_age = 60 * 60
+    return response
+
 # -----------------------------------------------------------
 # Route: Stock Search API - returns JSON with company and stock info
 # -----------------------------------------------------------
@@ -71,269 +981,204 @@ def index():
 @app.route('/search')
 def search():
     ticker = request.args.get("ticker", "").upper().strip()
-    print("Received ticker:", ticker)
+    logger.info("search ticker=%s", ticker)
 
     if not ticker:
         return jsonify({"error": "Ticker is required"}), 400
+    invalid = symbol_error(ticker)
+    if invalid is not None:
+        return invalid
 
     try:
-        # -----------------------------------------------------------
-        # Step 1: Fetch fresh data from Tiingo API
-        # -----------------------------------------------------------
-        meta_url = f"{TIINGO_BASE_META}{ticker}?token={TIINGO_API_KEY}"
-        iex_url = f"{TIINGO_BASE_IEX}{ticker}?token={TIINGO_API_KEY}"
-        fundamentals_url = f"{TIINGO_BASE_META}{ticker}/fundamentals?token={TIINGO_API_KEY}"
-
-        print("Requesting company metadata:", meta_url)
-        meta_resp = requests.get(meta_url)
-        print("Company metadata response status:", meta_resp.status_code)
-        print("Company metadata response body:", meta_resp.text)
-
-        if meta_resp.status_code != 200:
-            return jsonify({"error": "No record has been found, please enter a valid symbol."}), 404
-
-        company_data = meta_resp.json()
-        
-        # Debug print of company data fields
-        print("\nCompany Data Fields:")
-        print("Name:", company_data.get('name'))
-        print("Ticker:", company_data.get('ticker'))
-        print("Description:", company_data.get('description'))
-        print("Start Date:", company_data.get('startDate'))
-        print("Industry:", company_data.get('industry'))
-        print("Industry Code:", company_data.get('industryCode'))
-        print("Sector:", company_data.get('sector'))
-        print("Sector Code:", company_data.get('sectorCode'))
-        print("Website:", company_data.get('website'))
-        print("URL:", company_data.get('url'))
-        print("Exchange:", company_data.get('exchange'))
-        print("Exchange Code:", company_data.get('exchangeCode'))
-        print("\n")
-
-        # Write company data to JSON file
-        with open('company_data.json', 'w') as f:
-            json.dump(company_data, f, indent=4)
-        print("Company data written to company_data.json")
-
-        print("Requesting IEX data:", iex_url)
-        iex_resp = requests.get(iex_url)
-        print("IEX response status:", iex_resp.status_code)
-        print("IEX response body:", iex_resp.text)
-
-        # Write IEX response to JSON file
-        with open('iex_response.json', 'w') as f:
-            json.dump(iex_resp.json(), f, indent=4)
-        print("IEX response written to iex_response.json")
-
-        if iex_resp.status_code == 200:
-            iex_data = iex_resp.json()
-            stock_data = iex_data[0] if isinstance(iex_data, list) and iex_data else {}
-        else:
-            stock_data = {}
-
-        # Fetch fundamentals data
-        print("Requesting fundamentals data:", fundamentals_url)
-        fundamentals_resp = requests.get(fundamentals_url)
-        if fundamentals_resp.status_code == 200:
-            fundamentals_data = fundamentals_resp.json()
-            if fundamentals_data:
-                # Extract key financial metrics
-                latest_fundamentals = fundamentals_data[0] if isinstance(fundamentals_data, list) else fundamentals_data
-                stock_data.update({
-                    "revenue": latest_fundamentals.get("revenue"),
-                    "netIncome": latest_fundamentals.get("netIncome"),
-                    "eps": latest_fundamentals.get("eps"),
-                    "dividendYield": latest_fundamentals.get("dividendYield"),
-                    "peRatio": latest_fundamentals.get("peRatio"),
-                    "pbRatio": latest_fundamentals.get("pbRatio"),
-                    "debtToEquity": latest_fundamentals.get("debtToEquity"),
-                    "roe": latest_fundamentals.get("roe"),
-                    "marketCap": latest_fundamentals.get("marketCap")
-                })
-
-        # -----------------------------------------------------------
-        # Step 2: Get price data from DefeatBeta API (replacing Yahoo Finance)
-        # -----------------------------------------------------------
-        defeat_stock = None
-        try:
-            defeat_stock = Ticker(ticker)
-            
-            # Get comprehensive company summary data
-            try:
-                summary_data = defeat_stock.summary()
-                if not summary_data.empty:
-                    summary_row = summary_data.iloc[0]
-                    # Update company data with DefeatBeta summary information
-                    company_data.update({
-                        "market_cap": float(summary_row['market_cap']) if not pd.isna(summary_row['market_cap']) else None,
-                        "enterprise_value": float(summary_row['enterprise_value']) if not pd.isna(summary_row['enterprise_value']) else None,
-                        "shares_outstanding": float(summary_row['shares_outstanding']) if not pd.isna(summary_row['shares_outstanding']) else None,
-                        "beta": float(summary_row['beta']) if not pd.isna(summary_row['beta']) else None,
-                        "trailing_pe": float(summary_row['trailing_pe']) if not pd.isna(summary_row['trailing_pe']) else None,
-                        "forward_pe": float(summary_row['forward_pe']) if not pd.isna(summary_row['forward_pe']) else None,
-                        "trailing_eps": float(summary_row['tailing_eps']) if not pd.isna(summary_row['tailing_eps']) else None,
-                        "forward_eps": float(summary_row['forward_eps']) if not pd.isna(summary_row['forward_eps']) else None,
-                        "currency": summary_row['currency'] if not pd.isna(summary_row['currency']) else None
-                    })
-            except Exception as e:
-                print("Error fetching DefeatBeta summary data:", e)
-            
-            # Get additional company information
-            try:
-                company_info = defeat_stock.info()
-                if company_info is not None and not company_info.empty:
-                    info_row = company_info.iloc[0]
-                    company_data.update({
-                        "industry": info_row.get('industry') if not pd.isna(info_row.get('industry')) else company_data.get('industry'),
-                        "sector": info_row.get('sector') if not pd.isna(info_row.get('sector')) else company_data.get('sector'),
-                        "full_time_employees": int(info_row.get('full_time_employees')) if not pd.isna(info_row.get('full_time_employees')) else None,
-                        "website": info_row.get('web_site') if not pd.isna(info_row.get('web_site')) else company_data.get('website'),
-                        "long_business_summary": info_row.get('long_business_summary') if not pd.isna(info_row.get('long_business_summary')) else None,
-                        "address": info_row.get('address') if not pd.isna(info_row.get('address')) else None,
-                        "city": info_row.get('city') if not pd.isna(info_row.get('city')) else None,
-                        "country": info_row.get('country') if not pd.isna(info_row.get('country')) else None,
-                        "phone": info_row.get('phone') if not pd.isna(info_row.get('phone')) else None
-                    })
-            except Exception as e:
-                print("Error fetching DefeatBeta info:", e)
-            
-            price_data = defeat_stock.price()
-            
-            if not price_data.empty:
-                # Get the most recent price data (last close)
-                latest_price = price_data.iloc[-1]
-                # Get previous day's close for change calculation
-                if len(price_data) > 1:
-                    prev_close = price_data.iloc[-2]['close']
-                else:
-                    prev_close = latest_price['close']
-                # Update stock data with DefeatBeta price information
-                stock_data.update({
-                    "last_close": float(latest_price['close']) if not pd.isna(latest_price['close']) else None,
-                    "prevClose": float(prev_close) if not pd.isna(prev_close) else None,
-                    "open": float(latest_price['open']) if not pd.isna(latest_price['open']) else None,
-                    "high": float(latest_price['high']) if not pd.isna(latest_price['high']) else None,
-                    "low": float(latest_price['low']) if not pd.isna(latest_price['low']) else None,
-                    "volume": int(latest_price['volume']) if not pd.isna(latest_price['volume']) else None
-                })
-                # Try to get additional company info from quarterly income statement
-                try:
-                    income_stmt = defeat_stock.quarterly_income_statement()
-                    if income_stmt is not None and hasattr(income_stmt, 'data') and not income_stmt.data.empty:
-                        # Get TTM data from the income statement
-                        ttm_data = income_stmt.data.set_index('Breakdown')['TTM']
-                        
-                        # Extract key financial metrics
-                        stock_data.update({
-                            "revenue": ttm_data.get("Total Revenue"),
-                            "netIncome": ttm_data.get("Net Income Common Stockholders"),
-                            "eps": ttm_data.get("Diluted EPS")
-                        })
-                except Exception as e:
-                    print("Error fetching income statement data:", e)
-        except Exception as e:
-            print("Error fetching DefeatBeta data:", e)
-            # Keep existing price data if DefeatBeta fails
-
-        # -----------------------------------------------------------
-        # Step 3: Compute change and change_percent if valid
-        # -----------------------------------------------------------
-        last = stock_data.get("last_close")
-        prev_close = stock_data.get("prevClose")
-
-        if last is not None and prev_close is not None:
-            change = round(last - prev_close, 2)
-            change_percent = round((change / prev_close) * 100, 2)
-        else:
-            change = "N/A"
-            change_percent = "N/A"
+        # Answer from the latest snapshot when it is recent enough; a stale
+        # snapshot is still served while a background lookup replaces it.
+        if SEARCH_SNAPSHOT_ENABLED and request.args.get("refresh") != "1":
+            snapshot, state = serve_search_snapshot(ticker)
+            if snapshot is not None:
+                with get_db() as conn:
+                    save_search_history(conn, ticker, snapshot,
+                                        searched_at=datetime.now(timezone.utc).isoformat(),
+                                        store_payload=False)
+                response = jsonify(snapshot)
+                response.headers["X-Snapshot"] = state
+                return response
+
+        payload, error, fresh = lookup_ticker_shared(ticker, refresh=request.args.get("refresh") == "1")
+        if error is not None:
+            message, status = error
+            return jsonify({"error": message}), status
+
+        # Save API call data to the database
+        with stage_seconds.time("db_insert"), get_db() as conn:
+            save_lookup_history(conn, ticker, payload, fresh)
+
+        with stage_seconds.time("serialize"):
+            return jsonify(payload)
+
+    except Exception:
+        logger.exception("search failed ticker=%s", ticker)
+        return jsonify({"error": "Failed to fetch data from APIs."}), 500
 
-        stock_data["change"] = change
-        stock_data["change_percent"] = change_percent
+# -----------------------------------------------------------
+# Route: Streaming Stock Search API - one NDJSON line per finished section
+# -----------------------------------------------------------
+
+def ndjson_line(value):
+    return payload_json(value) + "\n"
+
+def stream_search_sections(ticker):
+    # Each line carries the company/stock documents merged from every section
+    # received so far, so the client can simply re-render on each line.
+    sections = {}
+    failed = {}
+    tasks = {name: partial(run_timed_source, name, source, ticker) for name, source in SEARCH_SOURCES.items()}
+    try:
+        for name, result, failure in iter_fanout(tasks, SEARCH_SOURCE_TIMEOUTS, SEARCH_SOURCE_TIMEOUT_SECONDS,
+                                                 executor=search_executor):
+            sections[name] = result
+            if failure is not None:
+                failed[name] = failure
+            if name == "meta" and result is None:
+                message, status = missing_meta_error(failed)
+                yield ndjson_line({"section": "error", "error": message, "status": status})
+                return
+            if result is None:
+                continue
+            company_data, stock_data = build_search_payload(sections)
+            yield ndjson_line({"section": name, "company": company_data, "stock": stock_data})
+
+        company_data, stock_data = build_search_payload(sections)
+        payload = {
+            "company": company_data,
+            "stock": stock_data,
+            "api_timestamp": datetime.now(timezone.utc).isoformat()
+        }
+        with stage_seconds.time("db_insert"), get_db() as conn:
+            save_search_history(conn, ticker, payload)
+        if shared_cache is not None:
+            shared_cache.put(f"search:{ticker}", payload_json(payload).encode(), SEARCH_SNAPSHOT_FRESH_SECONDS)
+
+        yield ndjson_line({"section": "done", **payload, "failed": sorted(failed)})
+
+    except Exception:
+        logger.exception("streaming search failed ticker=%s", ticker)
+        yield ndjson_line({"section": "error", "error": "Failed to fetch data from APIs.", "status": 500})
 
-        # -----------------------------------------------------------
-        # Step 5: Fetch annual income statement data for Gross Profit and EBITDA
-        # -----------------------------------------------------------
+@app.route('/search/stream')
+def search_stream():
+    ticker = request.args.get("ticker", "").upper().strip()
+    logger.info("search stream ticker=%s", ticker)
+
+    if not ticker:
+        return jsonify({"error": "Ticker is required"}), 400
+    invalid = symbol_error(ticker)
+    if invalid is not None:
+        return invalid
+
+    # A usable snapshot is complete already: send it as a single final line
+    if SEARCH_SNAPSHOT_ENABLED and request.args.get("refresh") != "1":
         try:
-            if defeat_stock is not None:
-                annual_income_stmt = defeat_stock.annual_income_statement()
-                
-                print(f"Annual income statement for {ticker}:")
-                print(f"Statement object: {annual_income_stmt}")
-                
-                if annual_income_stmt is not None and hasattr(annual_income_stmt, 'data') and not annual_income_stmt.data.empty:
-                    income_data = annual_income_stmt.data
-                    print(f"Income data columns: {income_data.columns.tolist()}")
-                    print(f"Income data shape: {income_data.shape}")
-                    print(f"Breakdown values: {income_data['Breakdown'].values.tolist()}")
-                    
-                    if len(income_data.columns) > 1:
-                        latest_year = income_data.columns[1]  # First column after 'Breakdown'
-                        print(f"Latest year column: {latest_year}")
-                        
-                        # Extract Gross Profit and EBITDA
-                        if 'Gross Profit' in income_data['Breakdown'].values:
-                            gross_profit = income_data.set_index('Breakdown').loc['Gross Profit', latest_year]
-                            print(f"Found Gross Profit: {gross_profit}")
-                        else:
-                            gross_profit = None
-                            print("Gross Profit not found in breakdown")
-                        
-                        if 'EBITDA' in income_data['Breakdown'].values:
-                            ebitda = income_data.set_index('Breakdown').loc['EBITDA', latest_year]
-                            print(f"Found EBITDA: {ebitda}")
-                        else:
-                            ebitda = None
-                            print("EBITDA not found in breakdown")
-                        
-                        stock_data['gross_profit'] = gross_profit
-                        stock_data['ebitda'] = ebitda
-                    else:
-                        print("Income data has insufficient columns")
-                        stock_data['gross_profit'] = None
-                        stock_data['ebitda'] = None
-                else:
-                    print("Annual income statement is None or empty")
-                    stock_data['gross_profit'] = None
-                    stock_data['ebitda'] = None
+            snapshot, state = serve_search_snapshot(ticker)
+            if snapshot is not None:
+                with get_db() as conn:
+                    save_search_history(conn, ticker, snapshot,
+                                        searched_at=datetime.now(timezone.utc).isoformat(),
+                                        store_payload=False)
+                response = Response(ndjson_line({"section": "done", **snapshot, "failed": []}),
+                                    mimetype="application/x-ndjson")
+                response.headers["X-Snapshot"] = state
+                return response
+        except Exception:
+            logger.exception("snapshot lookup failed ticker=%s", ticker)
+
+    response = Response(stream_search_sections(ticker), mimetype="application/x-ndjson")
+    response.headers["Cache-Control"] = "no-cache"
+    # Stop nginx from buffering the stream into a single response
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
+
+# -----------------------------------------------------------
+# Route: Batch Stock Search API - one combined document for many tickers
+# -----------------------------------------------------------
+
+def lookup_ticker_safely(ticker):
+    try:
+        # The same SearchHistory snapshots /search answers from
+        if SEARCH_SNAPSHOT_ENABLED:
+            snapshot, _ = serve_search_snapshot(ticker)
+            if snapshot is not None:
+                return snapshot, None, False
+        return lookup_ticker_shared(ticker)
+    except Exception:
+        logger.exception("batch lookup failed ticker=%s", ticker)
+        return None, ("Failed to fetch data from APIs.", 500), False
+
+def lookup_quote_safely(ticker):
+    # Watchlist polls only need the latest price: the quote section from the
+    # price cache or store, without the Tiingo calls of a full lookup
+    try:
+        stock_data = fetch_defeatbeta_quote(ticker)
+    except Exception:
+        logger.exception("batch quote failed ticker=%s", ticker)
+        return None, ("Failed to fetch price data.", 500), False
+    if stock_data.get("last_close") is None:
+        return None, ("No price data available", 404), False
+    add_price_change(stock_data)
+    return {"stock": stock_data}, None, False
+
+@app.route('/search/batch')
+def search_batch():
+    tickers = parse_ticker_list(request.args.get("tickers", ""))
+    # Watchlist polls return only each ticker's quote ({"stock": ...}),
+    # never record history, and mark their tickers as watched
+    watchlist = request.args.get("watch") == "1"
+    record_history = request.args.get("history", "1") != "0" and not watchlist
+
+    if not tickers:
+        return jsonify({"error": "At least one ticker is required"}), 400
+    if len(tickers) > BATCH_MAX_TICKERS:
+        return jsonify({"error": f"At most {BATCH_MAX_TICKERS} tickers per request"}), 400
+
+    try:
+        # Price frames go through the shared price cache, so tickers in the
+        # batch never fetch the same history twice.
+        # Malformed or unknown symbols get their error slot without a lookup
+        problems = {ticker: symbol_problem(ticker) for ticker in tickers}
+        valid = [ticker for ticker in tickers if problems[ticker] is None]
+        lookup = lookup_quote_safely if watchlist else lookup_ticker_safely
+        lookups = dict(zip(valid, batch_executor.map(lookup, valid)))
+
+        results = {}
+        found = []
+        for ticker in tickers:
+            payload, error, fresh = lookups.get(ticker) or (None, problems[ticker], False)
+            if error is not None:
+                message, status = error
+                results[ticker] = {"error": message, "status": status}
             else:
-                print("Defeat_stock is None, cannot fetch income statement")
-                stock_data['gross_profit'] = None
-                stock_data['ebitda'] = None
-        except Exception as e:
-            print('Error fetching annual income statement data:', e)
-            import traceback
-            traceback.print_exc()
-            stock_data['gross_profit'] = None
-            stock_data['ebitda'] = None
-
-        # Get current timestamp for API call using timezone-aware datetime
-        api_timestamp = datetime.now(timezone.utc).isoformat()
-
-        # -----------------------------------------------------------
-        # Step 4: Save API call data to the database
-        # -----------------------------------------------------------
-        with sqlite3.connect(DB_NAME) as conn:
-            conn.execute('''
-                INSERT INTO SearchHistory (ticker, company_json, stock_json, api_timestamp, timestamp)
-                VALUES (?, ?, ?, ?, ?)
-            ''', (
-                ticker,
-                str(company_data),
-                str(stock_data),
-                api_timestamp,
-                api_timestamp  # Set timestamp to the same value as api_timestamp
-            ))
+                results[ticker] = payload
+                found.append((ticker, payload, fresh))
+
+        if record_history and found:
+            # One transaction for the whole batch instead of one per ticker
+            with stage_seconds.time("db_insert"), get_db() as conn:
+                for ticker, payload, fresh in found:
+                    save_lookup_history(conn, ticker, payload, fresh)
+        if watchlist and found:
+            polled_at = datetime.now(timezone.utc).isoformat()
+            with get_db() as conn:
+                conn.executemany(
+                    'INSERT OR REPLACE INTO WatchedTickers (ticker, polled_at) VALUES (?, ?)',
+                    [(ticker, polled_at) for ticker, _, _ in found]
+                )
 
-        print(f"API call data saved for {ticker}")
         return jsonify({
-            "company": company_data,
-            "stock": stock_data,
-            "api_timestamp": api_timestamp
+            "tickers": tickers,
+            "results": results
         })
 
-    except Exception as e:
-        print("Error occurred during search request:", e)
+    except Exception:
+        logger.exception("batch search failed tickers=%s", ",".join(tickers))
         return jsonify({"error": "Failed to fetch data from APIs."}), 500
 
 # -----------------------------------------------------------
@@ -342,23 +1187,74 @@ def search():
 
 @app.route('/history')
 def history():
+    # Keyset pagination: X-Next-Before is set when more rows exist; pass it
+    # back as ?before= for the next page. It holds the last row's timestamp
+    # and, after a comma, its id (or ticker with ?collapse=1) so rows sharing
+    # a timestamp are neither skipped nor repeated. ?collapse=1 returns one
+    # row per ticker (its latest search) with a search count.
+    before = request.args.get("before")
+    collapse = request.args.get("collapse") == "1"
     try:
-        with sqlite3.connect(DB_NAME) as conn:
-            conn.row_factory = sqlite3.Row
-            rows = conn.execute('''
-                SELECT ticker, timestamp, api_timestamp
-                FROM SearchHistory
-                ORDER BY timestamp DESC
-            ''').fetchall()
-
-        history = [{
-            "ticker": row["ticker"],
-            "timestamp": row["timestamp"],
-            "api_timestamp": row["api_timestamp"]
-        } for row in rows]
-        return jsonify(history)
-    except Exception as e:
-        print("Error loading history:", e)
+        limit = min(max(int(request.args.get("limit", HISTORY_DEFAULT_LIMIT)), 1), HISTORY_MAX_LIMIT)
+    except ValueError:
+        return jsonify({"error": "limit must be an integer"}), 400
+
+    cursor = None
+    if before:
+        before_timestamp, _, before_key = before.rpartition(",")
+        if not before_timestamp:
+            return jsonify({"error": "before must be the X-Next-Before value of the previous page"}), 400
+        if not collapse:
+            try:
+                before_key = int(before_key)
+            except ValueError:
+                return jsonify({"error": "before must be the X-Next-Before value of the previous page"}), 400
+        cursor = (before_timestamp, before_key)
+
+    try:
+        with get_db() as conn:
+            if collapse:
+                # SQLite returns the other columns from the row holding MAX()
+                rows = conn.execute(f'''
+                    SELECT ticker, MAX(timestamp) AS timestamp, api_timestamp, COUNT(*) AS searches
+                    FROM SearchHistory
+                    GROUP BY ticker
+                    {"HAVING (MAX(timestamp), ticker) < (?, ?)" if cursor else ""}
+                    ORDER BY timestamp DESC, ticker DESC
+                    LIMIT ?
+                ''', (*(cursor or ()), limit + 1)).fetchall()
+            else:
+                # Separate statements so the timestamp index (which ends in
+                # the rowid) serves the range and the ordering
+                rows = conn.execute(f'''
+                    SELECT id, ticker, timestamp, api_timestamp
+                    FROM SearchHistory
+                    {"WHERE (timestamp, id) < (?, ?)" if cursor else ""}
+                    ORDER BY timestamp DESC, id DESC
+                    LIMIT ?
+                ''', (*(cursor or ()), limit + 1)).fetchall()
+
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+
+        history = []
+        for row in rows:
+            item = {
+                "ticker": row["ticker"],
+                "timestamp": row["timestamp"],
+                "api_timestamp": row["api_timestamp"]
+            }
+            if collapse:
+                item["searches"] = row["searches"]
+            history.append(item)
+
+        response = jsonify(history)
+        if has_more:
+            last = rows[-1]
+            response.headers["X-Next-Before"] = f'{last["timestamp"]},{last["ticker"] if collapse else last["id"]}'
+        return response
+    except Exception:
+        logger.exception("history query failed")
         return jsonify([])
 
 # -----------------------------------------------------------
@@ -369,54 +1265,61 @@ def history():
 def historical():
     ticker = request.args.get("ticker", "").upper().strip()
     period = request.args.get("period", "1y")  # 1d, 5d, 1mo, 3mo, 6mo, 1y, 2y, 5y, 10y, ytd, max
+    output_format = request.args.get("format", "rows")  # rows or columnar
+    start = request.args.get("start")  # optional YYYY-MM-DD, overrides period
+    end = request.args.get("end")
     
     if not ticker:
         return jsonify({"error": "Ticker is required"}), 400
+    invalid = symbol_error(ticker)
+    if invalid is not None:
+        return invalid
+    if output_format not in ("rows", "columnar"):
+        return jsonify({"error": "format must be 'rows' or 'columnar'"}), 400
+    if not valid_date_args(start, end):
+        return jsonify({"error": "start and end must be dates (YYYY-MM-DD)"}), 400
     
     try:
-        defeat_stock = Ticker(ticker)
-        price_data = defeat_stock.price()
+        # Convert period to number of days for filtering
+        days_to_include = PERIOD_DAYS.get(period, 365)
+
+        # An explicit date range replaces the period window; a period only
+        # reads its window (plus the most recent day, dropped below)
+        if start is None and end is None:
+            price_data = get_price_data(ticker, last=days_to_include + 1)
+        else:
+            price_data = get_price_data(ticker, start=start, end=end)
         
         if price_data.empty:
             return jsonify({"error": "No historical data available"}), 404
+
+        etag, last_modified, max_age = price_validators(price_data)
+        unchanged = not_modified(request, etag, last_modified)
+        if unchanged is not None:
+            return unchanged
         
-        # Remove the most recent day from the price history
-        if len(price_data) > 1:
-            price_data = price_data.iloc[:-1]
-        
-        # Convert period to number of days for filtering
-        period_days = {
-            "1d": 1, "5d": 5, "1mo": 30, "3mo": 90, "6mo": 180,
-            "1y": 365, "2y": 730, "5y": 1825, "10y": 3650, "ytd": 365, "max": 3650
-        }
-        
-        days_to_include = period_days.get(period, 365)
-        
-        # Filter data to include only the specified period
-        # Get the most recent data up to the specified period
-        if len(price_data) > days_to_include:
-            price_data = price_data.tail(days_to_include)
+        if start is None and end is None:
+            # Remove the most recent day from the price history
+            if len(price_data) > 1:
+                price_data = price_data.iloc[:-1]
+            
+            # Filter data to include only the specified period
+            # Get the most recent data up to the specified period
+            if len(price_data) > days_to_include:
+                price_data = price_data.tail(days_to_include)
         
-        # Convert to list of dictionaries for JSON serialization
-        historical_data = []
-        for _, row in price_data.iterrows():
-            historical_data.append({
-                "date": row['report_date'].strftime('%Y-%m-%d') if hasattr(row['report_date'], 'strftime') else str(row['report_date']),
-                "open": float(row['open']) if not pd.isna(row['open']) else None,
-                "high": float(row['high']) if not pd.isna(row['high']) else None,
-                "low": float(row['low']) if not pd.isna(row['low']) else None,
-                "close": float(row['close']) if not pd.isna(row['close']) else None,
-                "volume": int(row['volume']) if not pd.isna(row['volume']) else None
-            })
+        columns = price_columns(price_data)
         
-        return jsonify({
+        response = jsonify({
             "ticker": ticker,
             "period": period,
-            "data": historical_data
+            "format": output_format,
+            "data": columns if output_format == "columnar" else columns_to_rows(columns)
         })
+        return set_cache_headers(response, etag, last_modified, max_age)
         
-    except Exception as e:
-        print("Error fetching historical data:", e)
+    except Exception:
+        logger.exception("historical failed ticker=%s period=%s", ticker, period)
         return jsonify({"error": "Failed to fetch historical data"}), 500
 
 # -----------------------------------------------------------
@@ -427,60 +1330,104 @@ def historical():
 def returns():
     ticker = request.args.get("ticker", "").upper().strip()
     period = request.args.get("period", "1y")
+    output_format = request.args.get("format", "rows")  # rows or columnar
+    start = request.args.get("start")  # optional YYYY-MM-DD, overrides period
+    end = request.args.get("end")
     
     if not ticker:
         return jsonify({"error": "Ticker is required"}), 400
+    invalid = symbol_error(ticker)
+    if invalid is not None:
+        return invalid
+    if output_format not in ("rows", "columnar"):
+        return jsonify({"error": "format must be 'rows' or 'columnar'"}), 400
+    if not valid_date_args(start, end):
+        return jsonify({"error": "start and end must be dates (YYYY-MM-DD)"}), 400
     
     try:
-        defeat_stock = Ticker(ticker)
-        price_data = defeat_stock.price()
+        # Precomputed after the last close: no price load or math per request
+        snapshot = load_analytics(ticker, period) if start is None and end is None else None
+        if snapshot is not None and snapshot["returns_json"] is not None:
+            # Same validators as the live path, which reads just the window
+            etag, last_modified, max_age = bar_validators(
+                pd.Timestamp(snapshot["last_bar"]), min(snapshot["total_bars"], PERIOD_DAYS[period])
+            )
+            unchanged = not_modified(request, etag, last_modified)
+            if unchanged is not None:
+                return unchanged
+            columns = json.loads(snapshot["returns_json"])
+            response = jsonify({
+                "ticker": ticker,
+                "period": period,
+                "format": output_format,
+                "data": columns if output_format == "columnar" else columns_to_rows(columns)
+            })
+            return set_cache_headers(response, etag, last_modified, max_age)
+
+        # An explicit date range replaces the period window; a period only
+        # reads its window
+        if start is None and end is None:
+            price_data = get_price_data(ticker, last=PERIOD_DAYS.get(period, 365))
+        else:
+            price_data = get_price_data(ticker, start=start, end=end)
         
         if price_data.empty or len(price_data) < 2:
             return jsonify({"error": "Insufficient historical data"}), 404
-        
-        # Convert period to number of days for filtering
-        period_days = {
-            "1d": 1, "5d": 5, "1mo": 30, "3mo": 90, "6mo": 180,
-            "1y": 365, "2y": 730, "5y": 1825, "10y": 3650, "ytd": 365, "max": 3650
-        }
-        
-        days_to_include = period_days.get(period, 365)
-        
-        # Filter data to include only the specified period
-        if len(price_data) > days_to_include:
-            price_data = price_data.tail(days_to_include)
+
+        etag, last_modified, max_age = price_validators(price_data)
+        unchanged = not_modified(request, etag, last_modified)
+        if unchanged is not None:
+            return unchanged
         
         # Calculate daily returns
-        returns_data = []
-        for i in range(1, len(price_data)):
-            prev_close = price_data.iloc[i-1]['close']
-            curr_close = price_data.iloc[i]['close']
-            
-            if prev_close > 0:
-                daily_return = ((curr_close - prev_close) / prev_close) * 100
-            else:
-                daily_return = 0
-            
-            returns_data.append({
-                "date": price_data.iloc[i]['report_date'].strftime('%Y-%m-%d') if hasattr(price_data.iloc[i]['report_date'], 'strftime') else str(price_data.iloc[i]['report_date']),
-                "return": round(daily_return, 2),
-                "close": float(curr_close) if not pd.isna(curr_close) else None
-            })
+        columns = returns_columns(price_data)
         
-        return jsonify({
+        response = jsonify({
             "ticker": ticker,
             "period": period,
-            "data": returns_data
+            "format": output_format,
+            "data": columns if output_format == "columnar" else columns_to_rows(columns)
         })
+        return set_cache_headers(response, etag, last_modified, max_age)
         
-    except Exception as e:
-        print("Error calculating returns:", e)
+    except Exception:
+        logger.exception("returns failed ticker=%s period=%s", ticker, period)
         return jsonify({"error": "Failed to calculate returns"}), 500
 
 # -----------------------------------------------------------
 # Route: Beta Calculation API
 # -----------------------------------------------------------
 
+def beta_stats(stock_price_data, market_price_data, days):
+    # Beta, correlation and volatilities over the last `days` shared bars;
+    # None with fewer than 30 bars, beta None when the market never moved
+    closes = aligned_closes({"stock": stock_price_data, "market": market_price_data}, last=days)
+    if len(closes) < 30:
+        return None
+
+    risk = risk_matrix(daily_returns_matrix(closes))
+    market_variance = risk["covariance"][1, 1]
+    stock_volatility, market_volatility = risk["volatility"]
+    return {
+        "beta": float(risk["covariance"][0, 1] / market_variance) if market_variance != 0 else None,
+        "correlation": float(risk["correlation"][0, 1]) if market_variance != 0 else None,
+        "volatility": float(stock_volatility),
+        "benchmark_volatility": float(market_volatility)
+    }
+
+def beta_payload(ticker, period, stats):
+    beta = stats["beta"]
+    correlation = stats["correlation"]
+    return {
+        "ticker": ticker,
+        "period": period,
+        "beta": round(beta, 3),
+        "correlation": round(correlation, 3) if correlation is not None and np.isfinite(correlation) else None,
+        "annualized_volatility": round(stats["volatility"] * 100, 2),
+        "market_volatility": round(stats["benchmark_volatility"] * 100, 2),
+        "risk_level": "High" if abs(beta) > 1.5 else "Medium" if abs(beta) > 0.8 else "Low"
+    }
+
 @app.route('/beta')
 def beta():
     ticker = request.args.get("ticker", "").upper().strip()
@@ -488,76 +1435,462 @@ def beta():
     
     if not ticker:
         return jsonify({"error": "Ticker is required"}), 400
+    invalid = symbol_error(ticker)
+    if invalid is not None:
+        return invalid
     
     try:
-        defeat_stock = Ticker(ticker)
-        stock_price_data = defeat_stock.price()
+        snapshot = load_analytics(ticker, period)
+        if snapshot is not None and snapshot["beta"] is not None:
+            return jsonify(beta_payload(ticker, period, snapshot))
+
+        stock_price_data = get_price_data(ticker)
         
         if stock_price_data.empty:
             return jsonify({"error": "No stock data available"}), 404
         
-        spy_stock = Ticker("SPY")
-        market_price_data = spy_stock.price()
+        market_price_data = get_price_data("SPY")
         
         if market_price_data.empty:
             return jsonify({"error": "No market data available"}), 404
         
-        period_days = {
-            "1d": 1, "5d": 5, "1mo": 30, "3mo": 90, "6mo": 180,
-            "1y": 365, "2y": 730, "5y": 1825, "10y": 3650, "ytd": 365, "max": 3650
-        }
-        
-        days_to_include = period_days.get(period, 365)
+        days_to_include = PERIOD_DAYS.get(period, 365)
+        stats = beta_stats(stock_price_data, market_price_data, days_to_include)
         
-        if len(stock_price_data) > days_to_include:
-            stock_price_data = stock_price_data.tail(days_to_include)
-        if len(market_price_data) > days_to_include:
-            market_price_data = market_price_data.tail(days_to_include)
-        
-        stock_dates = set(stock_price_data['report_date'])
-        market_dates = set(market_price_data['report_date'])
-        common_dates = sorted(stock_dates.intersection(market_dates))
-        
-        if len(common_dates) < 30:
+        if stats is None:
             return jsonify({"error": "Insufficient data for beta calculation"}), 404
-        
-        stock_filtered = stock_price_data[stock_price_data['report_date'].isin(common_dates)].sort_values('report_date')
-        market_filtered = market_price_data[market_price_data['report_date'].isin(common_dates)].sort_values('report_date')
-        
-        stock_returns = stock_filtered['close'].pct_change().dropna()
-        market_returns = market_filtered['close'].pct_change().dropna()
-        
-        min_len = min(len(stock_returns), len(market_returns))
-        stock_returns = stock_returns.iloc[-min_len:]
-        market_returns = market_returns.iloc[-min_len:]
-        
-        covariance = stock_returns.cov(market_returns)
-        market_variance = market_returns.var()
-        
-        if market_variance == 0:
+        if stats["beta"] is None:
             return jsonify({"error": "Cannot calculate beta: market variance is zero"}), 500
         
-        beta = covariance / market_variance
-        
-        stock_volatility = stock_returns.std() * (252 ** 0.5)
-        market_volatility = market_returns.std() * (252 ** 0.5)
+        return jsonify(beta_payload(ticker, period, stats))
         
-        return jsonify({
-            "ticker": ticker,
+    except Exception:
+        logger.exception("beta failed ticker=%s period=%s", ticker, period)
+        return jsonify({"error": "Failed to calculate beta"}), 500
+
+# -----------------------------------------------------------
+# Route: Beta Matrix API - covariance, betas and correlations for many tickers
+# -----------------------------------------------------------
+
+def load_price_frames(symbols):
+    # Returns ({symbol: frame}, {symbol: error}) with the frames loaded
+    # concurrently; malformed or unknown symbols are never fetched
+    def load(symbol):
+        problem = symbol_problem(symbol)
+        if problem is not None:
+            return None, problem[0]
+        try:
+            return get_price_data(symbol), None
+        except Exception:
+            logger.warning("price load failed ticker=%s", symbol, exc_info=True)
+            return None, "Failed to fetch price data"
+
+    frames, errors = {}, {}
+    for symbol, (frame, error) in zip(symbols, batch_executor.map(load, symbols)):
+        if error is None and frame.empty:
+            error = "No price data available"
+        if error is None:
+            frames[symbol] = frame
+        else:
+            errors[symbol] = error
+    return frames, errors
+
+def rounded(values, digits=4):
+    # NumPy array -> nested lists with NaN/inf as null
+    return [rounded(v, digits) for v in values] if np.ndim(values) else (
+        round(float(values), digits) if np.isfinite(values) else None)
+
+@app.route('/beta/matrix')
+def beta_matrix():
+    tickers = parse_ticker_list(request.args.get("tickers", ""))
+    benchmarks = parse_ticker_list(request.args.get("benchmarks", "SPY"))
+    period = request.args.get("period", "1y")
+    try:
+        window = int(request.args.get("window", 60))  # rolling beta window, 0 to skip
+    except ValueError:
+        return jsonify({"error": "window must be an integer"}), 400
+    if window < 0 or window == 1:
+        return jsonify({"error": "window must be 0 or at least 2"}), 400
+
+    if not tickers:
+        return jsonify({"error": "At least one ticker is required"}), 400
+    if not benchmarks:
+        return jsonify({"error": "At least one benchmark is required"}), 400
+    if len(tickers) + len(benchmarks) > BATCH_MAX_TICKERS:
+        return jsonify({"error": f"At most {BATCH_MAX_TICKERS} symbols per request"}), 400
+
+    try:
+        symbols = list(dict.fromkeys(tickers + benchmarks))
+        frames, errors = load_price_frames(symbols)
+
+        missing_benchmarks = [b for b in benchmarks if b in errors]
+        if missing_benchmarks:
+            return jsonify({"error": f"No market data available for {', '.join(missing_benchmarks)}"}), 404
+
+        tickers = [t for t in tickers if t in frames]
+        if not tickers:
+            return jsonify({"error": "No price data available", "errors": errors}), 404
+
+        # One aligned date index for every symbol, then the period window
+        symbols = list(dict.fromkeys(tickers + benchmarks))
+        closes = aligned_closes({s: frames[s] for s in symbols}, last=PERIOD_DAYS.get(period, 365))
+
+        if len(closes) < 30:
+            return jsonify({"error": "Insufficient overlapping data for beta calculation"}), 404
+
+        returns = daily_returns_matrix(closes)
+        if window and not 2 <= window <= len(returns):
+            return jsonify({"error": f"window must be 0 or between 2 and {len(returns)} (the observations)"}), 400
+
+        risk = risk_matrix(returns)
+        asset_index = [symbols.index(t) for t in tickers]
+        benchmark_index = [symbols.index(b) for b in benchmarks]
+        beta_values = betas(risk["covariance"], asset_index, benchmark_index)
+
+        dates = format_dates(closes.index.to_series())
+        result = {
+            "tickers": tickers,
+            "benchmarks": benchmarks,
             "period": period,
-            "beta": round(beta, 3),
-            "annualized_volatility": round(stock_volatility * 100, 2),
-            "market_volatility": round(market_volatility * 100, 2),
-            "risk_level": "High" if abs(beta) > 1.5 else "Medium" if abs(beta) > 0.8 else "Low"
+            "start": dates[0],
+            "end": dates[-1],
+            "observations": len(returns),
+            "symbols": symbols,
+            "covariance": rounded(risk["covariance"], 8),
+            "correlation": rounded(risk["correlation"]),
+            "annualized_volatility": dict(zip(symbols, rounded(risk["volatility"] * 100, 2))),
+            "betas": {t: dict(zip(benchmarks, rounded(row, 3))) for t, row in zip(tickers, beta_values)},
+            "errors": errors
+        }
+
+        if window:
+            rolling = rolling_betas(returns, asset_index, benchmark_index, window)
+            result["rolling_beta"] = {
+                "window": window,
+                # Each window ends on the date of its last return
+                "dates": dates[window:],
+                "betas": {
+                    b: {t: rounded(rolling[j][:, i], 3) for i, t in enumerate(tickers)}
+                    for j, b in enumerate(benchmarks)
+                }
+            }
+
+        return jsonify(result)
+
+    except Exception:
+        logger.exception("beta matrix failed tickers=%s", ",".join(tickers))
+        return jsonify({"error": "Failed to calculate beta matrix"}), 500
+
+# -----------------------------------------------------------
+# Route: Technical Indicators API - SMA/EMA, RSI, MACD, Bollinger, volatility
+# -----------------------------------------------------------
+
+@app.route('/indicators')
+def indicators():
+    tickers = parse_ticker_list(request.args.get("tickers") or request.args.get("ticker", ""))
+    period = request.args.get("period", "1y")
+    requested = list(dict.fromkeys(
+        name.strip().lower() for name in request.args.get("indicators", ",".join(FAMILIES)).split(",") if name.strip()
+    ))
+    try:
+        window = int(request.args.get("window", INDICATORS_DEFAULT_WINDOW))
+    except ValueError:
+        return jsonify({"error": "window must be an integer"}), 400
+
+    if not tickers:
+        return jsonify({"error": "At least one ticker is required"}), 400
+    if len(tickers) > BATCH_MAX_TICKERS:
+        return jsonify({"error": f"At most {BATCH_MAX_TICKERS} symbols per request"}), 400
+    for ticker in tickers:
+        invalid = symbol_error(ticker)
+        if invalid is not None:
+            return invalid
+    if not 2 <= window <= INDICATORS_MAX_WINDOW:
+        return jsonify({"error": f"window must be between 2 and {INDICATORS_MAX_WINDOW}"}), 400
+    unknown = [name for name in requested if name not in FAMILIES]
+    if unknown:
+        return jsonify({"error": f"Unknown indicators: {', '.join(unknown)}. Use {', '.join(FAMILIES)}"}), 400
+    columns = [column for name in requested for column in FAMILIES[name]]
+
+    try:
+        frames, errors = load_price_frames(tickers)
+        tickers = [t for t in tickers if t in frames]
+        if not tickers:
+            return jsonify({"error": "No price data available", "errors": errors}), 404
+
+        # Each ticker over its own full history, so its values do not depend
+        # on which other tickers are in the request; the response lists the
+        # union of their dates with null where a ticker has no bar
+        closes = {t: close_series(frames[t]) for t in tickers}
+        dates = pd.DatetimeIndex(sorted(set().union(*(c.index for c in closes.values()))))
+        if dates.empty:
+            return jsonify({"error": "No price data available", "errors": errors}), 404
+
+        etag, last_modified, max_age = bar_validators(dates[-1], sum(len(c) for c in closes.values()))
+        unchanged = not_modified(request, etag, last_modified)
+        if unchanged is not None:
+            return unchanged
+
+        days_to_include = PERIOD_DAYS.get(period, 365)
+        dates = dates[-days_to_include:]
+        data = {}
+        for t in tickers:
+            series = indicator_cache.get((t, window), closes[t].index.to_numpy(), closes[t].to_numpy(), window)
+            rows = closes[t].index.get_indexer(dates)
+            found = rows >= 0
+            values = {"close": series.closes, **series.columns}
+            data[t] = {}
+            for name in ["close", *columns]:
+                column = np.full(len(dates), np.nan)
+                column[found] = values[name][rows[found]]
+                data[t][name] = float_values(np.round(column, 4))
+
+        response = jsonify({
+            "tickers": tickers,
+            "period": period,
+            "window": window,
+            "date": format_dates(dates.to_series()),
+            "data": data,
+            "errors": errors
         })
-        
-    except Exception as e:
-        print("Error calculating beta:", e)
-        return jsonify({"error": "Failed to calculate beta"}), 500
+        return set_cache_headers(response, etag, last_modified, max_age)
+
+    except Exception:
+        logger.exception("indicators failed tickers=%s", ",".join(tickers))
+        return jsonify({"error": "Failed to calculate indicators"}), 500
+
+# -----------------------------------------------------------
+# Route: Bulk Export API - streamed CSV or Parquet for many tickers
+# -----------------------------------------------------------
+
+def export_price_frames(tickers, start, end, skipped):
+    # One ticker's frame in memory at a time, with the close before start for
+    # the first day's return. The response has already started, so tickers
+    # that fail to load are logged and appended to skipped for the writer to
+    # report at the end. Reads go straight to the store, so a bulk export
+    # neither evicts the hot tickers from price_cache nor fills the shared
+    # cache with full histories nobody else asked for.
+    for ticker in tickers:
+        try:
+            price_data = price_store.load(ticker, start=start, end=end)
+            previous_close = None
+            if start is not None and not price_data.empty:
+                before = price_store.load(ticker, end=pd.Timestamp(start) - pd.Timedelta(days=1), last=1)
+                if not before.empty:
+                    previous_close = float(before["close"].iloc[-1])
+        except Exception:
+            logger.warning("export price load failed ticker=%s", ticker, exc_info=True)
+            skipped.append(ticker)
+            continue
+        if not price_data.empty:
+            yield ticker, price_data, previous_close
+
+@app.route('/export')
+def export():
+    tickers = parse_ticker_list(request.args.get("tickers") or request.args.get("ticker", ""))
+    start = request.args.get("start")  # optional YYYY-MM-DD
+    end = request.args.get("end")
+    output_format = request.args.get("format", "csv")  # csv or parquet
+
+    if not tickers:
+        return jsonify({"error": "At least one ticker is required"}), 400
+    if len(tickers) > EXPORT_MAX_TICKERS:
+        return jsonify({"error": f"At most {EXPORT_MAX_TICKERS} symbols per export"}), 400
+    for ticker in tickers:
+        invalid = symbol_error(ticker)
+        if invalid is not None:
+            return invalid
+    if not valid_date_args(start, end):
+        return jsonify({"error": "start and end must be dates (YYYY-MM-DD)"}), 400
+    if output_format not in ("csv", "parquet"):
+        return jsonify({"error": "format must be 'csv' or 'parquet'"}), 400
+    if output_format == "parquet" and pq is None:
+        return jsonify({"error": "Parquet export is not available on this server (install pyarrow)"}), 400
+
+    skipped = []
+    frames = export_price_frames(tickers, start, end, skipped)
+    if output_format == "parquet":
+        response = Response(parquet_chunks(frames, EXPORT_CHUNK_ROWS, skipped), mimetype="application/vnd.apache.parquet")
+    else:
+        response = Response(csv_chunks(frames, EXPORT_CHUNK_ROWS, skipped), mimetype="text/csv")
+    filename = "_".join(["prices", start or "first", end or "latest"])
+    response.headers["Content-Disposition"] = f'attachment; filename="{filename}.{output_format}"'
+    response.headers["Cache-Control"] = "no-cache"
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
+
+# -----------------------------------------------------------
+# Route: Portfolio Valuation API - holdings, P&L and value history
+# -----------------------------------------------------------
+
+@app.route('/portfolio/valuation', methods=['POST'])
+def portfolio_valuation():
+    body = request.get_json(silent=True) or {}
+    if not isinstance(body, dict):
+        return jsonify({"error": "Request body must be a JSON object"}), 400
+    try:
+        transactions = parse_transactions(body.get("transactions", []))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception:
+        logger.exception("portfolio transactions could not be parsed")
+        return jsonify({"error": "Failed to read transactions"}), 500
+
+    if transactions.empty:
+        return jsonify({"error": "At least one transaction is required"}), 400
+    if len(transactions) > PORTFOLIO_MAX_TRANSACTIONS:
+        return jsonify({"error": f"At most {PORTFOLIO_MAX_TRANSACTIONS} transactions per request"}), 400
+
+    tickers = list(dict.fromkeys(transactions["ticker"]))
+    if len(tickers) > BATCH_MAX_TICKERS:
+        return jsonify({"error": f"At most {BATCH_MAX_TICKERS} tickers per portfolio"}), 400
+
+    try:
+        frames, errors = load_price_frames(tickers)
+
+        # One date x ticker close matrix for every held ticker; gaps carry
+        # the previous close forward
+        if frames:
+            closes = pd.concat(
+                {t: f.drop_duplicates('report_date', keep='last').set_index('report_date')['close']
+                 for t, f in frames.items()},
+                axis=1
+            ).sort_index().ffill()
+        else:
+            closes = pd.DataFrame()
+
+        holdings = replay_holdings(transactions)
+        rows = []
+        totals = {"cost_basis": 0.0, "market_value": 0.0, "unrealized_pnl": 0.0, "realized_pnl": 0.0}
+        for ticker in tickers:
+            h = holdings[ticker]
+            last_price = float(closes[ticker].iloc[-1]) if ticker in closes and not pd.isna(closes[ticker].iloc[-1]) else None
+            market_value = h["shares"] * last_price if last_price is not None else None
+            unrealized = market_value - h["cost_basis"] if market_value is not None else None
+            rows.append({
+                "ticker": ticker,
+                "shares": h["shares"],
+                "avg_cost": round(h["cost_basis"] / h["shares"], 4) if h["shares"] else None,
+                "cost_basis": round(h["cost_basis"], 2),
+                "last_price": last_price,
+                "market_value": round(market_value, 2) if market_value is not None else None,
+                "unrealized_pnl": round(unrealized, 2) if unrealized is not None else None,
+                "realized_pnl": round(h["realized_pnl"], 2)
+            })
+            totals["realized_pnl"] += h["realized_pnl"]
+            if market_value is not None:
+                totals["cost_basis"] += h["cost_basis"]
+                totals["market_value"] += market_value
+                totals["unrealized_pnl"] += unrealized
+
+        totals = {k: round(v, 2) for k, v in totals.items()}
+        totals["return_percent"] = (
+            round(totals["unrealized_pnl"] / totals["cost_basis"] * 100, 2) if totals["cost_basis"] else None
+        )
+
+        series = {"date": [], "value": [], "net_invested": []}
+        if not closes.empty:
+            first_date = transactions["date"].min()
+            window = closes[closes.index >= first_date] if not pd.isna(first_date) else closes.tail(PERIOD_DAYS["1y"])
+            if not window.empty:
+                value, net_invested = value_series(transactions, window)
+                series = {
+                    "date": format_dates(window.index.to_series()),
+                    "value": float_values(value.round(2)),
+                    "net_invested": float_values(net_invested.round(2))
+                }
+
+        return jsonify({
+            "holdings": rows,
+            "totals": totals,
+            "series": series,
+            "errors": errors
+        })
+
+    except Exception:
+        logger.exception("portfolio valuation failed tickers=%s", ",".join(tickers))
+        return jsonify({"error": "Failed to value portfolio"}), 500
+
+# -----------------------------------------------------------
+# Analytics materialization: precompute /returns and /beta after each close
+# -----------------------------------------------------------
+
+def load_analytics(ticker, period):
+    # The precomputed row, if it was computed after the latest market close
+    # and covers the bars the store would serve now. A job that ran before
+    # the day's bar was published leaves a row one bar behind; once the
+    # store picks that bar up (or is due a refresh) the live path answers.
+    if not ANALYTICS_ENABLED or period not in PERIOD_DAYS:
+        return None
+    with get_db() as conn:
+        row = conn.execute(
+            'SELECT * FROM AnalyticsSnapshot WHERE ticker = ? AND period = ? AND benchmark = ?',
+            (ticker, period, ANALYTICS_BENCHMARK)
+        ).fetchone()
+    if row is None:
+        return None
+    now = datetime.now(timezone.utc)
+    if datetime.fromisoformat(row["computed_at"]) < session_close(latest_session(now)):
+        return None
+    if price_store.stored_bars(ticker) != (row["total_bars"], pd.Timestamp(row["last_bar"])):
+        return None
+    return row
+
+def materialize_analytics(tickers):
+    # Returns (tickers written, {ticker: error})
+    symbols = list(dict.fromkeys([ANALYTICS_BENCHMARK, *tickers]))
+    frames, errors = load_price_frames(symbols)
+    benchmark = frames.get(ANALYTICS_BENCHMARK)
+    if benchmark is None:
+        return 0, errors
+
+    computed_at = datetime.now(timezone.utc).isoformat()
+    rows = []
+    for ticker, frame in frames.items():
+        last_bar = str(frame["report_date"].iloc[-1])
+        for period, days in PERIOD_DAYS.items():
+            stats = beta_stats(frame, benchmark, days) or {}
+            window = frame.tail(days)
+            rows.append((
+                ticker, period, ANALYTICS_BENCHMARK, computed_at, last_bar, len(frame),
+                stats.get("beta"), stats.get("correlation"), stats.get("volatility"), stats.get("benchmark_volatility"),
+                payload_json(returns_columns(window)) if len(window) >= 2 else None
+            ))
+
+    with get_db() as conn:
+        conn.executemany('''
+            INSERT OR REPLACE INTO AnalyticsSnapshot
+                (ticker, period, benchmark, computed_at, last_bar, total_bars,
+                 beta, correlation, volatility, benchmark_volatility, returns_json)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', rows)
+    return len(frames), errors
+
+def run_materialize_analytics():
+    started = time.perf_counter()
+    tickers = hot_tickers([ANALYTICS_BENCHMARK, *ANALYTICS_TICKERS])
+    written, errors = materialize_analytics(tickers)
+    logger.info("analytics materialized tickers=%d written=%d failed=%d seconds=%.2f",
+                len(tickers), written, len(errors), time.perf_counter() - started)
+
+@app.cli.command("materialize-analytics")
+@click.option("--loop", is_flag=True, help="Keep running, once after every market close.")
+def materialize_analytics_command(loop):
+    """Precompute returns, volatility, beta and correlation for the tracked universe."""
+    run_materialize_analytics()
+    while loop:
+        wake = next_close(datetime.now(timezone.utc)) + timedelta(seconds=ANALYTICS_RUN_DELAY_SECONDS)
+        time.sleep(max((wake - datetime.now(timezone.utc)).total_seconds(), 0))
+        try:
+            run_materialize_analytics()
+        except Exception:
+            logger.exception("analytics materialization failed")
 
 # -----------------------------------------------------------
 # Main execution
 # -----------------------------------------------------------
 
 if __name__ == '__main__':
+    init_db()
+    metrics.reset()
     app.run(debug=True, port=5001)
\ No newline at end of file
@@ -0,0 +1,348 @@
+"""Load benchmark for the Flask app against local stand-ins for Tiingo and DefeatBeta.
+
+Run from the repository root:
+
+    python benchmark.py --concurrency 16 --requests 2000 --save baseline.json
+    python benchmark.py --concurrency 16 --requests 2000 --compare baseline.json
+
+The app runs in-process on a threaded server with its database, price store
+and shared cache in a scratch directory. Tiingo calls go to a local stub
+server replaying recorded-shape responses and DefeatBeta's ``Ticker`` is
+replaced with a fake returning synthetic frames of configurable size, so
+results do not depend on the network or upstream quota.
+"""
+
+import argparse
+import json
+import logging
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import requests
+
+
+BENCHMARK_ENDPOINTS = ("search", "historical", "returns", "beta", "history")
+
+# Response shapes recorded from the Tiingo daily meta, IEX and fundamentals endpoints
+TIINGO_META = {
+    "ticker": "{ticker}",
+    "name": "{ticker} Holdings Inc - Class A",
+    "description": "Benchmark fixture company. " * 20,
+    "startDate": "1980-12-12",
+    "endDate": "2025-06-13",
+    "exchangeCode": "NASDAQ",
+}
+TIINGO_IEX = [{
+    "ticker": "{ticker}",
+    "timestamp": "2025-06-13T20:00:00+00:00",
+    "lastSaleTimestamp": "2025-06-13T20:00:00+00:00",
+    "quoteTimestamp": "2025-06-13T20:00:00+00:00",
+    "open": 199.73, "high": 200.37, "low": 195.7, "mid": None,
+    "tngoLast": 196.45, "last": 196.45, "lastSize": None,
+    "bidSize": None, "bidPrice": None, "askPrice": None, "askSize": None,
+    "volume": 51447349, "prevClose": 199.2,
+}]
+TIINGO_FUNDAMENTALS = [{
+    "date": "2025-06-13",
+    "marketCap": 2934164355000.0, "enterpriseVal": 2977545355000.0,
+    "peRatio": 30.61, "pbRatio": 44.01, "trailingPEG1Y": 3.27,
+    "revenue": 400366000000.0, "netIncome": 97294000000.0, "eps": 6.42,
+    "dividendYield": 0.0052, "debtToEquity": 1.47, "roe": 1.38,
+}]
+
+
+# -----------------------------------------------------------
+# Stand-ins: stub Tiingo server and fake DefeatBeta Ticker
+# -----------------------------------------------------------
+
+def fill(template, ticker):
+    return json.loads(json.dumps(template).replace("{ticker}", ticker))
+
+
+def start_tiingo_stub(latency):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            time.sleep(latency)
+            parts = self.path.split("?")[0].strip("/").split("/")
+            if parts[:2] == ["tiingo", "daily"] and len(parts) == 3:
+                body = fill(TIINGO_META, parts[2].upper())
+            elif parts[:2] == ["tiingo", "daily"] and parts[3:] == ["fundamentals"]:
+                body = fill(TIINGO_FUNDAMENTALS, parts[2].upper())
+            elif parts[0] == "iex" and len(parts) == 2:
+                body = fill(TIINGO_IEX, parts[1].upper())
+            else:
+                self.send_error(404)
+                return
+            data = json.dumps(body).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+class FakeTicker:
+    """Drop-in for ``defeatbeta_api.data.ticker.Ticker`` with synthetic, seeded data."""
+
+    rows = 2520
+    statement_periods = 8
+    latency = 0.0
+
+    def __init__(self, ticker):
+        self.ticker = ticker.upper()
+        self.rng = np.random.default_rng(zlib.crc32(self.ticker.encode()))
+
+    def price(self):
+        time.sleep(self.latency)
+        dates = pd.bdate_range(end=pd.Timestamp("2025-06-13"), periods=self.rows)
+        close = 100 * np.exp(np.cumsum(self.rng.normal(0.0003, 0.015, self.rows)))
+        return pd.DataFrame({
+            "symbol": self.ticker,
+            "report_date": dates,
+            "open": close * (1 + self.rng.normal(0, 0.003, self.rows)),
+            "close": close,
+            "high": close * 1.01,
+            "low": close * 0.99,
+            "volume": self.rng.integers(1_000_000, 50_000_000, self.rows),
+        })
+
+    def summary(self):
+        time.sleep(self.latency)
+        return pd.DataFrame([{
+            "symbol": self.ticker, "market_cap": 2.9e12, "enterprise_value": 3.0e12,
+            "shares_outstanding": 1.5e10, "beta": 1.2, "trailing_pe": 30.6, "forward_pe": 27.1,
+            "tailing_eps": 6.42, "forward_eps": 7.25, "currency": "USD",
+        }])
+
+    def info(self):
+        time.sleep(self.latency)
+        return pd.DataFrame([{
+            "symbol": self.ticker, "industry": "Consumer Electronics", "sector": "Technology",
+            "full_time_employees": 164000, "web_site": "https://example.com",
+            "long_business_summary": "Synthetic company for benchmarks.", "address": "1 Bench Way",
+            "city": "Cupertino", "country": "United States", "phone": "000-000-0000",
+        }])
+
+    def quarterly_income_statement(self):
+        return self._statement(quarterly=True)
+
+    def annual_income_statement(self):
+        return self._statement(quarterly=False)
+
+    def _statement(self, quarterly):
+        time.sleep(self.latency)
+        breakdown = ["Total Revenue", "Cost of Revenue", "Gross Profit", "Operating Expense",
+                     "Net Income Common Stockholders", "Diluted EPS", "EBITDA"]
+        ends = pd.date_range(end="2025-03-31", periods=self.statement_periods, freq="QE" if quarterly else "YE")
+        columns = {"Breakdown": breakdown, "TTM": self.rng.uniform(1e9, 4e11, len(breakdown))}
+        for end in reversed(ends):
+            columns[end.strftime("%Y-%m-%d")] = self.rng.uniform(1e9, 4e11, len(breakdown))
+        return SimpleNamespace(data=pd.DataFrame(columns))
+
+
+# -----------------------------------------------------------
+# App under test
+# -----------------------------------------------------------
+
+def start_app(args):
+    # Relative paths in app.py (database, price store, shared cache) land in
+    # the scratch directory instead of the working tree.
+    workdir = args.workdir or tempfile.mkdtemp(prefix="stocklookup-bench-")
+    os.makedirs(workdir, exist_ok=True)
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    os.chdir(workdir)
+
+    import app as stocklookup
+    from tiingo_client import RateLimiter, TokenBucket
+    from werkzeug.serving import make_server
+
+    stocklookup.init_db()
+
+    logging.getLogger().setLevel(logging.WARNING)
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)
+
+    stub = start_tiingo_stub(args.upstream_latency / 1000)
+    stub_url = f"http://127.0.0.1:{stub.server_port}"
+    stocklookup.TIINGO_BASE_META = f"{stub_url}/tiingo/daily/"
+    stocklookup.TIINGO_BASE_IEX = f"{stub_url}/iex/"
+    # The stub has no quota; keep the client's limiter out of the measurement
+    stocklookup.tiingo.limiter = RateLimiter([TokenBucket(10 ** 9, 1)])
+
+    FakeTicker.rows = args.rows
+    FakeTicker.statement_periods = args.statement_periods
+    FakeTicker.latency = args.upstream_latency / 1000
+    stocklookup.Ticker = FakeTicker
+
+    server = make_server("127.0.0.1", 0, stocklookup.app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_port}", workdir
+
+
+# -----------------------------------------------------------
+# Load generation and reporting
+# -----------------------------------------------------------
+
+# Period windows for /historical and /returns (keys of app.PERIOD_DAYS)
+BENCH_PERIODS = ["1mo", "6mo", "1y", "5y"]
+
+
+def build_workload(args):
+    rng = random.Random(args.seed)
+    tickers = [f"BENCH{i:03d}" for i in range(args.tickers)]
+    endpoints = [e.strip() for e in args.endpoints.split(",") if e.strip()]
+    refresh = "&refresh=1" if args.search_refresh else ""
+    paths = {
+        "search": lambda t: f"/search?ticker={t}{refresh}",
+        "historical": lambda t: f"/historical?ticker={t}&period={rng.choice(BENCH_PERIODS)}",
+        "returns": lambda t: f"/returns?ticker={t}&period={rng.choice(BENCH_PERIODS)}",
+        "beta": lambda t: f"/beta?ticker={t}&period=1y",
+        "history": lambda t: "/history",
+    }
+    return [(endpoint, paths[endpoint](rng.choice(tickers)))
+            for endpoint in (endpoints[i % len(endpoints)] for i in range(args.requests))]
+
+
+def run_load(base_url, workload, concurrency, timeout):
+    local = threading.local()
+
+    def call(item):
+        endpoint, path = item
+        session = getattr(local, "session", None)
+        if session is None:
+            session = local.session = requests.Session()
+        started = time.perf_counter()
+        try:
+            ok = session.get(base_url + path, timeout=timeout).status_code < 400
+        except requests.RequestException:
+            ok = False
+        return endpoint, time.perf_counter() - started, ok
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        samples = list(executor.map(call, workload))
+    return samples, time.perf_counter() - started
+
+
+def summarize(samples, elapsed):
+    by_endpoint = {}
+    for endpoint, latency, ok in samples:
+        by_endpoint.setdefault(endpoint, []).append((latency, ok))
+    by_endpoint["all"] = [(latency, ok) for _, latency, ok in samples]
+
+    report = {}
+    for endpoint, values in by_endpoint.items():
+        latencies = np.array([latency for latency, _ in values]) * 1000
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+        report[endpoint] = {
+            "requests": len(values),
+            "errors": sum(1 for _, ok in values if not ok),
+            "throughput_rps": round(len(values) / elapsed, 2),
+            "mean_ms": round(float(latencies.mean()), 2),
+            "p50_ms": round(float(p50), 2),
+            "p95_ms": round(float(p95), 2),
+            "p99_ms": round(float(p99), 2),
+        }
+    return report
+
+
+def print_report(report, baseline=None):
+    columns = ("requests", "errors", "throughput_rps", "p50_ms", "p95_ms", "p99_ms")
+    print(f"{'endpoint':<12}" + "".join(f"{c:>18}" for c in columns))
+    for endpoint, row in report.items():
+        cells = []
+        for column in columns:
+            cell = f"{row[column]}"
+            base = (baseline or {}).get(endpoint, {}).get(column)
+            if base and column not in ("requests", "errors"):
+                cell += f" ({(row[column] - base) / base * 100:+.1f}%)"
+            cells.append(f"{cell:>18}")
+        print(f"{endpoint:<12}" + "".join(cells))
+
+
+def p95_regressions(report, baseline, threshold_percent):
+    return [
+        endpoint for endpoint, row in report.items()
+        if baseline.get(endpoint, {}).get("p95_ms")
+        and (row["p95_ms"] - baseline[endpoint]["p95_ms"]) / baseline[endpoint]["p95_ms"] * 100 > threshold_percent
+    ]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--concurrency", type=int, default=8, help="concurrent client threads")
+    parser.add_argument("--requests", type=int, default=1000, help="measured requests")
+    parser.add_argument("--warmup", type=int, default=100, help="unmeasured requests sent first")
+    parser.add_argument("--endpoints", default=",".join(BENCHMARK_ENDPOINTS),
+                        help="comma-separated subset of " + ",".join(BENCHMARK_ENDPOINTS))
+    parser.add_argument("--tickers", type=int, default=20, help="distinct synthetic tickers")
+    parser.add_argument("--rows", type=int, default=2520, help="daily bars per synthetic price history")
+    parser.add_argument("--statement-periods", type=int, default=8, help="periods per income statement")
+    parser.add_argument("--upstream-latency", type=float, default=50, help="stand-in latency per call in ms")
+    parser.add_argument("--search-refresh", action="store_true", help="bypass /search snapshots")
+    parser.add_argument("--seed", type=int, default=1, help="workload random seed")
+    parser.add_argument("--timeout", type=float, default=60, help="client timeout per request in seconds")
+    parser.add_argument("--url", help="benchmark an already running server instead of starting one")
+    parser.add_argument("--workdir", help="scratch directory for the in-process app")
+    parser.add_argument("--save", help="write the report to this JSON file")
+    parser.add_argument("--compare", help="baseline JSON file from an earlier --save")
+    parser.add_argument("--fail-on-regression", type=float, metavar="PERCENT",
+                        help="exit 1 if any endpoint's p95 is this much worse than the baseline")
+    args = parser.parse_args(argv)
+
+    # Resolve report paths before start_app() changes directory
+    save = os.path.abspath(args.save) if args.save else None
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["report"]
+
+    if args.url:
+        base_url = args.url.rstrip("/")
+    else:
+        base_url, workdir = start_app(args)
+        print(f"app at {base_url}, scratch directory {workdir}")
+
+    workload = build_workload(args)
+    if args.warmup:
+        run_load(base_url, build_workload(argparse.Namespace(**{**vars(args), "requests": args.warmup,
+                                                               "seed": args.seed + 1})),
+                 args.concurrency, args.timeout)
+
+    samples, elapsed = run_load(base_url, workload, args.concurrency, args.timeout)
+    report = summarize(samples, elapsed)
+    print(f"{len(samples)} requests in {elapsed:.2f}s at concurrency {args.concurrency}")
+    print_report(report, baseline)
+
+    if save:
+        with open(save, "w") as f:
+            json.dump({"config": {k: v for k, v in vars(args).items() if k not in ("save", "compare")},
+                       "report": report}, f, indent=2)
+
+    if baseline is not None and args.fail_on_regression is not None:
+        regressions = p95_regressions(report, baseline, args.fail_on_regression)
+        if regressions:
+            print(f"p95 regressed more than {args.fail_on_regression}% on: {', '.join(regressions)}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
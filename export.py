@@ -0,0 +1,125 @@
+"""Streaming CSV and Parquet export of price history, one bounded chunk at a time."""
+
+import io
+
+import numpy as np
+import pandas as pd
+
+from price_columns import daily_returns
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # optional: CSV only
+    pa = pq = None
+
+
+EXPORT_COLUMNS = ["ticker", "date", "open", "high", "low", "close", "volume", "return"]
+
+PARQUET_SCHEMA = pa.schema([
+    ("ticker", pa.string()),
+    ("date", pa.timestamp("ms")),
+    *((name, pa.float64()) for name in ("open", "high", "low", "close")),
+    ("volume", pa.int64()),
+    ("return", pa.float64()),
+]) if pa is not None else None
+
+
+def export_frame(ticker, price_data, previous_close=None):
+    """One ticker's bars as export rows; ``return`` is the daily % change.
+
+    ``previous_close`` is the close before the first exported bar, so a date
+    range export still has a return on its first day; without it that return
+    is empty.
+    """
+    close = price_data["close"].to_numpy(dtype="float64")
+    returns = np.full(len(close), np.nan)
+    if previous_close is None:
+        returns[1:] = daily_returns(close)
+    elif len(close):
+        returns[:] = daily_returns(np.concatenate([[previous_close], close]))
+    volume = price_data["volume"].to_numpy(dtype="float64")
+    return pd.DataFrame({
+        "ticker": ticker,
+        "date": pd.to_datetime(price_data["report_date"]).to_numpy(),
+        "open": price_data["open"].to_numpy(dtype="float64"),
+        "high": price_data["high"].to_numpy(dtype="float64"),
+        "low": price_data["low"].to_numpy(dtype="float64"),
+        "close": close,
+        "volume": pd.array(np.round(volume), dtype="Int64"),
+        "return": returns,
+    }, columns=EXPORT_COLUMNS)
+
+
+def chunks(frames, chunk_rows):
+    # Export rows of (ticker, price_data, previous_close) triples, chunk_rows
+    # at a time. Only one ticker's rows are built at once, so memory stays
+    # bounded by the largest history rather than the whole export.
+    for ticker, price_data, previous_close in frames:
+        table = export_frame(ticker, price_data, previous_close)
+        for start in range(0, len(table), chunk_rows):
+            yield table.iloc[start:start + chunk_rows]
+
+
+def csv_chunks(frames, chunk_rows=5000, skipped=None):
+    """CSV text for ``frames`` (an iterable of (ticker, price_data, previous_close)), header first.
+
+    ``skipped`` is a list the frames iterable fills with tickers it could not
+    load; once the rows are written, a non-empty list is reported in a final
+    ``# incomplete`` comment line.
+    """
+    yield ",".join(EXPORT_COLUMNS) + "\n"
+    for chunk in chunks(frames, chunk_rows):
+        yield chunk.to_csv(header=False, index=False, date_format="%Y-%m-%d")
+    if skipped:
+        yield f"# incomplete: failed to load {' '.join(skipped)}\n"
+
+
+class ChunkSink(io.RawIOBase):
+    """Write-only file that hands back what was written since the last ``drain``.
+
+    ``tell`` keeps counting across drains, since the Parquet footer records
+    absolute offsets.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._chunks = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self):
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def parquet_chunks(frames, chunk_rows=5000, skipped=None):
+    """Parquet bytes for ``frames``, one row group per chunk, streamed as each is written.
+
+    Tickers left in ``skipped`` are recorded in the footer's key-value
+    metadata as ``skipped_tickers`` (comma-separated).
+    """
+    if pq is None:
+        raise RuntimeError("Parquet export requires pyarrow")
+    sink = ChunkSink()
+    writer = pq.ParquetWriter(sink, PARQUET_SCHEMA)
+    yield sink.drain()
+    for chunk in chunks(frames, chunk_rows):
+        writer.write_table(pa.Table.from_pandas(chunk, schema=PARQUET_SCHEMA, preserve_index=False))
+        yield sink.drain()
+    if skipped:
+        writer.add_key_value_metadata({"skipped_tickers": ",".join(skipped)})
+    writer.close()
+    yield sink.drain()
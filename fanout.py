@@ -0,0 +1,95 @@
+"""Run independent upstream fetches concurrently, each with its own deadline."""
+
+import concurrent.futures
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+def run_fanout(tasks, timeouts, default_timeout, executor=None):
+    """Run ``tasks`` (name -> zero-argument callable) and collect their results.
+
+    With an ``executor`` every task is submitted at once and each result is
+    awaited until ``timeouts.get(name, default_timeout)`` seconds after the
+    fan-out started. A task that raises or misses its deadline yields
+    ``None`` so the caller can degrade that section instead of failing the
+    whole response. Without an executor the tasks run one after another.
+
+    Returns ``(results, failed)`` where ``failed`` maps task names to
+    ``"timeout"`` or ``"error"``.
+    """
+    results = {}
+    failed = {}
+
+    if executor is None:
+        for name, task in tasks.items():
+            try:
+                results[name] = task()
+            except Exception:
+                logger.warning("source failed source=%s", name, exc_info=True)
+                results[name] = None
+                failed[name] = "error"
+        return results, failed
+
+    started = time.monotonic()
+    futures = {name: executor.submit(task) for name, task in tasks.items()}
+
+    # Collect in deadline order so a short deadline is not held up by a
+    # long-running task ahead of it.
+    for name in sorted(futures, key=lambda n: timeouts.get(n, default_timeout)):
+        deadline = started + timeouts.get(name, default_timeout)
+        try:
+            results[name] = futures[name].result(timeout=max(0, deadline - time.monotonic()))
+        except concurrent.futures.TimeoutError:
+            logger.warning("source timed out source=%s", name)
+            futures[name].cancel()
+            results[name] = None
+            failed[name] = "timeout"
+        except Exception:
+            logger.warning("source failed source=%s", name, exc_info=True)
+            results[name] = None
+            failed[name] = "error"
+
+    return results, failed
+
+
+def iter_fanout(tasks, timeouts, default_timeout, executor=None):
+    """Like ``run_fanout`` but yields ``(name, result, failure)`` as each task finishes.
+
+    ``failure`` is ``None``, ``"timeout"`` or ``"error"``. Tasks are yielded
+    in completion order, so a fast task is never held back by a slow one.
+    """
+    if executor is None:
+        for name, task in tasks.items():
+            try:
+                yield name, task(), None
+            except Exception:
+                logger.warning("source failed source=%s", name, exc_info=True)
+                yield name, None, "error"
+        return
+
+    started = time.monotonic()
+    futures = {executor.submit(task): name for name, task in tasks.items()}
+    deadlines = {future: started + timeouts.get(name, default_timeout) for future, name in futures.items()}
+    pending = set(futures)
+
+    while pending:
+        # Wake up for the next completion or the nearest deadline
+        wait = max(0, min(deadlines[f] for f in pending) - time.monotonic())
+        done, _ = concurrent.futures.wait(pending, timeout=wait, return_when=concurrent.futures.FIRST_COMPLETED)
+        for future in done:
+            pending.discard(future)
+            name = futures[future]
+            try:
+                yield name, future.result(), None
+            except Exception:
+                logger.warning("source failed source=%s", name, exc_info=True)
+                yield name, None, "error"
+
+        now = time.monotonic()
+        for future in [f for f in pending if deadlines[f] <= now]:
+            pending.discard(future)
+            future.cancel()
+            logger.warning("source timed out source=%s", futures[future])
+            yield futures[future], None, "timeout"
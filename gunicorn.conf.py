@@ -0,0 +1,20 @@
+"""Gunicorn settings: migrate the schema once in the master, warm each worker after boot."""
+
+# Import app.py once in the master; workers fork with it already loaded.
+# That includes pandas and numpy, which nearly every route uses, so they
+# stay eager imports: deferring them would only move their import into each
+# worker's first request. DefeatBeta is the exception (see import_defeatbeta).
+preload_app = True
+
+
+def on_starting(server):
+    from app import init_db, metrics
+    init_db()
+    # Totals start from zero on each deploy, like a single process's counters
+    metrics.reset()
+
+
+def post_worker_init(worker):
+    from app import metrics, start_warmup
+    metrics.start_flusher()
+    start_warmup()
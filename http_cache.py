@@ -0,0 +1,107 @@
+"""HTTP caching (ETag, Last-Modified, market-close lifetimes) and response compression."""
+
+import gzip
+import hashlib
+from datetime import datetime, time, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+from flask import Response
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only
+    brotli = None
+
+
+MARKET_TIMEZONE = ZoneInfo("America/New_York")
+MARKET_CLOSE = time(16, 0)
+
+
+def price_etag(*parts):
+    """Weak ETag for a response fully determined by ``parts`` (request and last bar)."""
+    return hashlib.sha1("|".join(str(p) for p in parts).encode()).hexdigest()[:24]
+
+
+def session_close(day):
+    # Market close of a trading day as an aware UTC datetime
+    return datetime.combine(day, MARKET_CLOSE, MARKET_TIMEZONE).astimezone(timezone.utc)
+
+
+def bar_last_modified(last_bar, now=None):
+    # A daily bar is final at its session's close (never in the future)
+    return min(session_close(last_bar.date()), now or datetime.now(timezone.utc)).replace(microsecond=0)
+
+
+def latest_session(now):
+    """Date of the most recent weekday session that has already closed."""
+    local = now.astimezone(MARKET_TIMEZONE)
+    day = local.date() if local.time() >= MARKET_CLOSE else local.date() - timedelta(days=1)
+    while day.weekday() >= 5:
+        day -= timedelta(days=1)
+    return day
+
+
+def next_close(now):
+    local = now.astimezone(MARKET_TIMEZONE)
+    day = local.date() if local.time() < MARKET_CLOSE else local.date() + timedelta(days=1)
+    while day.weekday() >= 5:
+        day += timedelta(days=1)
+    return session_close(day)
+
+
+def price_max_age(last_bar, pending_max_age, now=None):
+    """Seconds a price response ending at ``last_bar`` may be cached.
+
+    Once the latest closed session's bar is in, nothing changes until the
+    next close, so the response is cacheable until then. While that bar is
+    still missing (or on holidays), use ``pending_max_age`` so the browser
+    revalidates soon and picks the bar up when it lands.
+    """
+    now = now or datetime.now(timezone.utc)
+    if last_bar.date() >= latest_session(now):
+        return max(int((next_close(now) - now).total_seconds()), 0)
+    return pending_max_age
+
+
+def not_modified(request, etag, last_modified):
+    """A 304 response when the request's validators match, else ``None``."""
+    if request.if_none_match:
+        matched = request.if_none_match.contains_weak(etag)
+    elif request.if_modified_since:
+        matched = last_modified <= request.if_modified_since
+    else:
+        matched = False
+    if not matched:
+        return None
+    response = Response(status=304)
+    response.set_etag(etag, weak=True)
+    response.last_modified = last_modified
+    return response
+
+
+def set_cache_headers(response, etag, last_modified, max_age):
+    response.set_etag(etag, weak=True)
+    response.last_modified = last_modified
+    response.cache_control.public = True
+    response.cache_control.max_age = max_age
+    return response
+
+
+def compress_response(response, accept_encodings, min_bytes, gzip_level=5, brotli_quality=4):
+    """Brotli- or gzip-encode a buffered JSON response of at least ``min_bytes``."""
+    if (response.status_code != 200 or response.direct_passthrough or response.is_streamed
+            or response.mimetype != "application/json" or "Content-Encoding" in response.headers):
+        return response
+
+    response.vary.add("Accept-Encoding")
+    body = response.get_data()
+    if len(body) < min_bytes:
+        return response
+
+    if brotli is not None and accept_encodings["br"]:
+        response.set_data(brotli.compress(body, quality=brotli_quality))
+        response.headers["Content-Encoding"] = "br"
+    elif accept_encodings["gzip"]:
+        response.set_data(gzip.compress(body, compresslevel=gzip_level))
+        response.headers["Content-Encoding"] = "gzip"
+    return response
@@ -0,0 +1,223 @@
+"""Vectorized technical indicators over close prices, extendable one bar at a time."""
+
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+TRADING_DAYS = 252
+RSI_PERIOD = 14
+MACD_FAST, MACD_SLOW, MACD_SIGNAL = 12, 26, 9
+BOLLINGER_WIDTH = 2.0
+
+INDICATORS = ("sma", "ema", "rsi", "macd", "macd_signal", "macd_histogram",
+              "bollinger_upper", "bollinger_lower", "volatility")
+
+# Names a client asks for -> the columns they produce
+FAMILIES = {
+    "sma": ("sma",),
+    "ema": ("ema",),
+    "rsi": ("rsi",),
+    "macd": ("macd", "macd_signal", "macd_histogram"),
+    "bollinger": ("bollinger_upper", "bollinger_lower"),
+    "volatility": ("volatility",),
+}
+
+
+def span_alpha(span):
+    return 2.0 / (span + 1)
+
+
+def ewm(values, alpha):
+    # y[t] = y[t-1] + alpha * (x[t] - y[t-1]), seeded with the first value
+    return pd.DataFrame(values).ewm(alpha=alpha, adjust=False).mean().to_numpy().reshape(values.shape)
+
+
+def trailing(values, window, reduce):
+    # reduce() over every trailing window of rows, NaN until the first window fills
+    out = np.full(values.shape, np.nan)
+    if len(values) >= window:
+        out[window - 1:] = reduce(sliding_window_view(values, window, axis=0), axis=-1)
+    return out
+
+
+class IndicatorSeries:
+    """Indicator columns over a close history, plus the state to extend them.
+
+    ``closes`` is an (n,) array for one ticker or an (n, k) matrix of aligned
+    closes for k tickers; every indicator is computed for all of them in one
+    vectorized pass over the history. ``extended(close)`` returns a new series
+    with one more bar, advancing the EMA/MACD/RSI recurrences from their last
+    values and re-reducing only the trailing window, so a new daily bar costs
+    O(window) instead of a pass over the whole history.
+
+    Indicators are NaN until they have enough bars: ``window`` for SMA, EMA
+    and Bollinger bands, ``window + 1`` for volatility, ``RSI_PERIOD + 1`` for
+    RSI and ``MACD_SLOW`` (plus ``MACD_SIGNAL - 1`` for the signal) for MACD.
+    """
+
+    def __init__(self, closes, window=20):
+        closes = np.asarray(closes, dtype="float64")
+        self.window = window
+        self.closes = closes
+        self.min_history = max(window, RSI_PERIOD, MACD_SLOW + MACD_SIGNAL) + 1
+        if len(closes) == 0:
+            self.columns = {name: closes.copy() for name in INDICATORS}
+            return
+
+        ema = ewm(closes, span_alpha(window))
+        fast = ewm(closes, span_alpha(MACD_FAST))
+        slow = ewm(closes, span_alpha(MACD_SLOW))
+        macd = fast - slow
+        signal = ewm(macd, span_alpha(MACD_SIGNAL))
+
+        change = np.diff(closes, axis=0)
+        avg_gain, avg_loss = self._wilder(np.clip(change, 0, None)), self._wilder(np.clip(-change, 0, None))
+
+        sma = trailing(closes, window, np.mean)
+        std = trailing(closes, window, np.std)
+        volatility = np.full(closes.shape, np.nan)
+        volatility[1:] = trailing(closes[1:] / closes[:-1] - 1, window, lambda w, axis: np.std(w, axis=axis, ddof=1))
+        volatility *= np.sqrt(TRADING_DAYS)
+
+        rsi = np.full(closes.shape, np.nan)
+        if avg_gain is not None:
+            rsi[RSI_PERIOD:] = self._rsi(avg_gain, avg_loss)
+
+        self.columns = {
+            "sma": sma,
+            "ema": self._warm(ema, window),
+            "rsi": rsi,
+            "macd": self._warm(macd, MACD_SLOW),
+            "macd_signal": self._warm(signal, MACD_SLOW + MACD_SIGNAL - 1),
+            "macd_histogram": self._warm(macd - signal, MACD_SLOW + MACD_SIGNAL - 1),
+            "bollinger_upper": sma + BOLLINGER_WIDTH * std,
+            "bollinger_lower": sma - BOLLINGER_WIDTH * std,
+            "volatility": volatility,
+        }
+        # Last values of the recurrences, for extended()
+        self._ema, self._fast, self._slow, self._signal = ema[-1], fast[-1], slow[-1], signal[-1]
+        self._avg_gain = avg_gain[-1] if avg_gain is not None else None
+        self._avg_loss = avg_loss[-1] if avg_loss is not None else None
+
+    def __len__(self):
+        return len(self.closes)
+
+    def extended(self, close):
+        """A new series with ``close`` (a scalar, or one value per ticker) appended."""
+        close = np.asarray(close, dtype="float64")
+        closes = np.concatenate([self.closes, close[None]])
+        if len(self.closes) < self.min_history:
+            return IndicatorSeries(closes, self.window)
+
+        series = IndicatorSeries.__new__(IndicatorSeries)
+        series.window, series.closes, series.min_history = self.window, closes, self.min_history
+        series._ema = self._ema + span_alpha(self.window) * (close - self._ema)
+        series._fast = self._fast + span_alpha(MACD_FAST) * (close - self._fast)
+        series._slow = self._slow + span_alpha(MACD_SLOW) * (close - self._slow)
+        macd = series._fast - series._slow
+        series._signal = self._signal + span_alpha(MACD_SIGNAL) * (macd - self._signal)
+
+        change = close - self.closes[-1]
+        series._avg_gain = self._avg_gain + (np.clip(change, 0, None) - self._avg_gain) / RSI_PERIOD
+        series._avg_loss = self._avg_loss + (np.clip(-change, 0, None) - self._avg_loss) / RSI_PERIOD
+
+        tail = closes[-(self.window + 1):]
+        sma, std = tail[1:].mean(axis=0), tail[1:].std(axis=0)
+        row = {
+            "sma": sma,
+            "ema": series._ema,
+            "rsi": self._rsi(series._avg_gain, series._avg_loss),
+            "macd": macd,
+            "macd_signal": series._signal,
+            "macd_histogram": macd - series._signal,
+            "bollinger_upper": sma + BOLLINGER_WIDTH * std,
+            "bollinger_lower": sma - BOLLINGER_WIDTH * std,
+            "volatility": np.std(tail[1:] / tail[:-1] - 1, axis=0, ddof=1) * np.sqrt(TRADING_DAYS),
+        }
+        series.columns = {name: np.concatenate([self.columns[name], np.asarray(row[name])[None]]) for name in INDICATORS}
+        return series
+
+    @staticmethod
+    def _wilder(values):
+        # Wilder's smoothing seeded with the mean of the first RSI_PERIOD values;
+        # element i averages values[:RSI_PERIOD + i]
+        if len(values) < RSI_PERIOD:
+            return None
+        seeded = values[RSI_PERIOD - 1:].copy()
+        seeded[0] = values[:RSI_PERIOD].mean(axis=0)
+        return ewm(seeded, 1.0 / RSI_PERIOD)
+
+    @staticmethod
+    def _rsi(avg_gain, avg_loss):
+        # 100 when there were no losses, 50 when the price never moved
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rsi = 100 - 100 / (1 + avg_gain / avg_loss)
+        return np.where(avg_loss == 0, np.where(avg_gain == 0, 50.0, 100.0), rsi)
+
+    @staticmethod
+    def _warm(values, bars):
+        values = values.copy()
+        values[:bars - 1] = np.nan
+        return values
+
+
+class IndicatorCache:
+    """LRU of ``IndicatorSeries`` keyed by (ticker, window).
+
+    ``get`` compares the requested history with the cached one: the same dates
+    and closes are a hit, the cached history plus exactly one new bar extends
+    the cached series, and anything else (a longer gap, or a revised close
+    anywhere in the history, as when a split or dividend re-adjusts it)
+    recomputes from scratch. Comparing the closes is a vector equality check,
+    far cheaper than the recompute it guards.
+    """
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (dates, series)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.extends = 0
+        self.misses = 0
+
+    def get(self, key, dates, closes, window):
+        dates = np.asarray(dates)
+        closes = np.asarray(closes, dtype="float64")
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+
+        series = None
+        if entry is not None:
+            cached_dates, cached = entry
+            if (len(dates) == len(cached_dates) and dates[-1] == cached_dates[-1]
+                    and np.array_equal(closes, cached.closes, equal_nan=True)):
+                with self._lock:
+                    self.hits += 1
+                return cached
+            if (len(dates) == len(cached_dates) + 1 and dates[-2] == cached_dates[-1]
+                    and np.array_equal(closes[:-1], cached.closes, equal_nan=True)):
+                series = cached.extended(closes[-1])
+                with self._lock:
+                    self.extends += 1
+
+        if series is None:
+            series = IndicatorSeries(closes, window)
+            with self._lock:
+                self.misses += 1
+
+        with self._lock:
+            self._entries[key] = (dates, series)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return series
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "extends": self.extends, "misses": self.misses}
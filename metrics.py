@@ -0,0 +1,218 @@
+"""Minimal Prometheus metrics: histograms, counters and a text renderer, summed across workers."""
+
+import atexit
+import bisect
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import closing, contextmanager
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+
+class Histogram:
+    def __init__(self, name, help_text, label, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label = label
+        self.buckets = tuple(buckets)
+        self._series = {}  # label value -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, label_value, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_value)
+            if series is None:
+                series = self._series[label_value] = [0] * (len(self.buckets) + 2)
+            if index < len(self.buckets):
+                series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    @contextmanager
+    def time(self, label_value):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(label_value, time.perf_counter() - started)
+
+    def rows(self):
+        # (label value, slot, value): one slot per bucket, then sum and count
+        with self._lock:
+            return [(label_value, slot, value) for label_value, values in self._series.items()
+                    for slot, value in enumerate(values)]
+
+    def render_rows(self, rows):
+        series = {}
+        for label_value, slot, value in rows:
+            series.setdefault(label_value, [0] * (len(self.buckets) + 2))[slot] = value
+        return self.render(series)
+
+    def render(self, series=None):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        if series is None:
+            with self._lock:
+                series = {key: list(values) for key, values in self._series.items()}
+        for label_value, values in sorted(series.items()):
+            label = f'{self.label}="{_escape(label_value)}"'
+            cumulative = 0
+            for bound, count in zip(self.buckets, values):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{label},le="{bound}"}} {cumulative}')
+            lines.append(f'{self.name}_bucket{{{label},le="+Inf"}} {values[-1]}')
+            lines.append(f"{self.name}_sum{{{label}}} {values[-2]}")
+            lines.append(f"{self.name}_count{{{label}}} {values[-1]}")
+        return "\n".join(lines)
+
+
+class Counter:
+    def __init__(self, name, help_text, label):
+        self.name = name
+        self.help_text = help_text
+        self.label = label
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, label_value, amount=1):
+        with self._lock:
+            self._values[label_value] = self._values.get(label_value, 0) + amount
+
+    def rows(self):
+        with self._lock:
+            return [(label_value, 0, value) for label_value, value in self._values.items()]
+
+    def render_rows(self, rows):
+        return self.render({label_value: value for label_value, _, value in rows})
+
+    def render(self, values=None):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        if values is None:
+            with self._lock:
+                values = dict(self._values)
+        for label_value, value in sorted(values.items()):
+            lines.append(f'{self.name}{{{self.label}="{_escape(label_value)}"}} {value}')
+        return "\n".join(lines)
+
+
+class Registry:
+    """The metrics of this process, optionally summed with the other workers on the node.
+
+    With a ``path``, every process writes its running totals to a SQLite (WAL)
+    file shared by the node's workers, under an id of its own: from a
+    background thread every ``flush_seconds`` (see ``start_flusher``) and
+    whenever it renders. ``render`` then sums the rows of every process, so a
+    scrape that lands on any worker sees the node's totals. Rows of workers
+    that have exited stay, since their counts are part of those totals;
+    ``reset`` clears them when the server starts. If the file cannot be used,
+    a process renders only its own metrics.
+    """
+
+    def __init__(self, path=None, flush_seconds=5, busy_timeout=5):
+        self.metrics = []
+        self.path = path
+        self.flush_seconds = flush_seconds
+        self.busy_timeout = busy_timeout
+        self._process = None  # (pid, id) so a forked worker gets its own rows
+        self._flusher_pid = None
+        self._lock = threading.Lock()
+
+    def histogram(self, name, help_text, label, buckets=DEFAULT_BUCKETS):
+        metric = Histogram(name, help_text, label, buckets)
+        self.metrics.append(metric)
+        return metric
+
+    def counter(self, name, help_text, label):
+        metric = Counter(name, help_text, label)
+        self.metrics.append(metric)
+        return metric
+
+    def render(self):
+        if self.path is not None:
+            try:
+                self.flush()
+                totals = self._totals()
+                return "\n".join(metric.render_rows(totals.get(metric.name, [])) for metric in self.metrics) + "\n"
+            except sqlite3.Error as e:
+                logger.warning("shared metrics unavailable path=%s error=%r; rendering this worker only", self.path, e)
+        return "\n".join(metric.render() for metric in self.metrics) + "\n"
+
+    def flush(self):
+        process = self._process_id()
+        rows = [(process, metric.name, label_value, slot, value)
+                for metric in self.metrics for label_value, slot, value in metric.rows()]
+        with closing(self._connect()) as conn, conn:
+            conn.executemany(
+                'INSERT OR REPLACE INTO metric_values (process, metric, label, slot, value) VALUES (?, ?, ?, ?, ?)',
+                rows
+            )
+
+    def reset(self):
+        # Forget every process's totals; for the server master before workers start
+        if self.path is None:
+            return
+        with closing(self._connect()) as conn, conn:
+            conn.execute('DELETE FROM metric_values')
+
+    def start_flusher(self):
+        # At most once per process; gunicorn's post_worker_init calls it in
+        # each worker, since threads do not survive the fork
+        if self.path is None:
+            return
+        with self._lock:
+            if self._flusher_pid == os.getpid():
+                return
+            self._flusher_pid = os.getpid()
+        threading.Thread(target=self._flush_loop, name="metrics-flush", daemon=True).start()
+        atexit.register(self._flush_quietly)
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(self.flush_seconds)
+            self._flush_quietly()
+
+    def _flush_quietly(self):
+        try:
+            self.flush()
+        except sqlite3.Error as e:
+            logger.warning("metrics flush failed path=%s error=%r", self.path, e)
+
+    def _totals(self):
+        # metric name -> [(label value, slot, value summed over processes)]
+        totals = {}
+        with closing(self._connect()) as conn:
+            for metric, label_value, slot, value in conn.execute(
+                    'SELECT metric, label, slot, SUM(value) FROM metric_values GROUP BY metric, label, slot'):
+                totals.setdefault(metric, []).append((label_value, slot, value))
+        return totals
+
+    def _process_id(self):
+        with self._lock:
+            if self._process is None or self._process[0] != os.getpid():
+                self._process = (os.getpid(), f"{os.getpid()}-{uuid.uuid4().hex[:8]}")
+            return self._process[1]
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=self.busy_timeout)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS metric_values (
+                process TEXT NOT NULL,
+                metric TEXT NOT NULL,
+                label TEXT NOT NULL,
+                slot INTEGER NOT NULL,
+                value NUMERIC NOT NULL,  -- counts stay integers
+                PRIMARY KEY (process, metric, label, slot)
+            )
+        ''')
+        return conn
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
@@ -0,0 +1,92 @@
+"""Portfolio holdings, P&L and daily value series from a transaction list."""
+
+import math
+
+import numpy as np
+import pandas as pd
+
+
+def parse_transactions(raw):
+    """Validate client transactions into a DataFrame.
+
+    Each transaction is ``{"type": "buy"|"sell", "ticker", "shares", "price",
+    "date"?}``; timezone-aware dates keep their local calendar day. Raises
+    ``ValueError`` with a user-facing message on bad input.
+    """
+    if not isinstance(raw, list):
+        raise ValueError("transactions must be a list")
+
+    rows = []
+    for i, tx in enumerate(raw):
+        if not isinstance(tx, dict):
+            raise ValueError(f"transaction {i} must be an object")
+        tx_type = str(tx.get("type", "")).lower()
+        ticker = str(tx.get("ticker", "")).upper().strip()
+        try:
+            shares = float(tx.get("shares"))
+            price = float(tx.get("price"))
+        except (TypeError, ValueError):
+            raise ValueError(f"transaction {i} needs numeric shares and price")
+        if not math.isfinite(shares) or not math.isfinite(price):
+            raise ValueError(f"transaction {i} needs finite shares and price")
+        if tx_type not in ("buy", "sell") or not ticker or shares <= 0 or price < 0:
+            raise ValueError(f"transaction {i} is invalid")
+        date = tx.get("date") or None
+        if date is not None:
+            try:
+                date = pd.Timestamp(date)
+            except (TypeError, ValueError):
+                raise ValueError(f"transaction {i} has an invalid date")
+            if pd.isna(date):
+                raise ValueError(f"transaction {i} has an invalid date")
+            # Price bars are naive dates; keep the transaction's own calendar day
+            date = date.tz_localize(None).normalize()
+        rows.append((tx_type, ticker, shares, price, date))
+
+    frame = pd.DataFrame(rows, columns=["type", "ticker", "shares", "price", "date"])
+    frame["date"] = pd.to_datetime(frame["date"])
+    frame["signed_shares"] = np.where(frame["type"] == "buy", frame["shares"], -frame["shares"])
+    return frame
+
+
+def replay_holdings(transactions):
+    """Average-cost replay in entry order: shares, cost basis and realized P&L per ticker."""
+    holdings = {}
+    for tx in transactions.itertuples(index=False):
+        h = holdings.setdefault(tx.ticker, {"shares": 0.0, "cost_basis": 0.0, "realized_pnl": 0.0})
+        if tx.type == "buy":
+            h["shares"] += tx.shares
+            h["cost_basis"] += tx.shares * tx.price
+        else:
+            sold = min(tx.shares, h["shares"])
+            avg_cost = h["cost_basis"] / h["shares"] if h["shares"] > 0 else 0.0
+            h["realized_pnl"] += sold * (tx.price - avg_cost)
+            h["shares"] -= sold
+            h["cost_basis"] -= sold * avg_cost
+            if h["shares"] <= 1e-9:
+                h["shares"] = 0.0
+                h["cost_basis"] = 0.0
+    return holdings
+
+
+def value_series(transactions, closes):
+    """Daily portfolio value and net invested cash over ``closes``' dates.
+
+    ``closes`` is a date-indexed frame with one column per ticker (forward
+    filled). Undated transactions count from the first date of the series;
+    dated ones apply from the first trading day on or after their date.
+    """
+    dates = closes.index
+    effective = transactions["date"].fillna(dates[0])
+    position = np.searchsorted(dates.values, effective.values.astype(dates.values.dtype), side="left")
+    in_range = position < len(dates)
+    tx = transactions[in_range].assign(day=dates[position[in_range]])
+
+    deltas = tx.pivot_table(index="day", columns="ticker", values="signed_shares", aggfunc="sum")
+    positions = deltas.reindex(dates).fillna(0).cumsum().clip(lower=0)
+    positions = positions.reindex(columns=closes.columns, fill_value=0)
+    value = (positions * closes).sum(axis=1, min_count=1)
+
+    cash = (tx["signed_shares"] * tx["price"]).groupby(tx["day"]).sum()
+    net_invested = cash.reindex(dates).fillna(0).cumsum()
+    return value, net_invested
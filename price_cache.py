@@ -0,0 +1,102 @@
+"""In-process cache of DefeatBeta daily price history, shared by every route."""
+
+import threading
+import time
+from collections import OrderedDict
+
+
+class PriceCache:
+    """TTL + LRU cache holding one parsed price DataFrame per ticker.
+
+    Entries expire after ``ttl_seconds``. When the cache holds more than
+    ``max_entries`` frames or more than ``max_bytes`` of DataFrame memory,
+    the least recently used unpinned entries are evicted. Pinned tickers
+    (hot benchmarks such as SPY) are refreshed on expiry but never evicted.
+
+    Cached frames are shared between requests and must be treated as
+    read-only by callers.
+    """
+
+    def __init__(self, loader, ttl_seconds=900, max_entries=256,
+                 max_bytes=256 * 1024 * 1024, pinned=("SPY",)):
+        self.loader = loader
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.pinned = {t.upper() for t in pinned}
+        self._entries = OrderedDict()  # ticker -> (loaded_at, frame, nbytes)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, ticker):
+        ticker = ticker.upper()
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(ticker)
+            if entry is not None and now - entry[0] < self.ttl_seconds:
+                self._entries.move_to_end(ticker)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        # Load outside the lock so a slow upstream fetch for one ticker
+        # does not block lookups of every other ticker.
+        frame = self.loader(ticker)
+        self.put(ticker, frame)
+        return frame
+
+    def peek(self, ticker):
+        """The cached frame if it is present and fresh; never loads on a miss."""
+        ticker = ticker.upper()
+        with self._lock:
+            entry = self._entries.get(ticker)
+            if entry is None or time.monotonic() - entry[0] >= self.ttl_seconds:
+                return None
+            self._entries.move_to_end(ticker)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, ticker, frame):
+        ticker = ticker.upper()
+        nbytes = int(frame.memory_usage(deep=True).sum())
+        with self._lock:
+            old = self._entries.pop(ticker, None)
+            if old is not None:
+                self._bytes -= old[2]
+            self._entries[ticker] = (time.monotonic(), frame, nbytes)
+            self._bytes += nbytes
+            self._evict()
+
+    def invalidate(self, ticker=None):
+        with self._lock:
+            if ticker is None:
+                self._entries.clear()
+                self._bytes = 0
+                return
+            old = self._entries.pop(ticker.upper(), None)
+            if old is not None:
+                self._bytes -= old[2]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+    def _evict(self):
+        # Walk from least to most recently used, skipping pinned tickers.
+        for ticker in list(self._entries):
+            if len(self._entries) <= self.max_entries and self._bytes <= self.max_bytes:
+                break
+            if ticker in self.pinned:
+                continue
+            _, _, nbytes = self._entries.pop(ticker)
+            self._bytes -= nbytes
+            self.evictions += 1
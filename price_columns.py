@@ -0,0 +1,64 @@
+"""Vectorized conversion of DefeatBeta price frames into JSON-ready columns."""
+
+import numpy as np
+import pandas as pd
+
+
+def format_dates(dates):
+    # Same output as calling strftime('%Y-%m-%d') (or str) on every value
+    if pd.api.types.is_datetime64_any_dtype(dates):
+        return dates.dt.strftime('%Y-%m-%d').tolist()
+    return dates.astype(str).tolist()
+
+
+def float_values(values):
+    values = np.asarray(values, dtype="float64")
+    out = values.tolist()
+    for i in np.flatnonzero(np.isnan(values)):
+        out[i] = None
+    return out
+
+
+def int_values(values):
+    values = np.asarray(values, dtype="float64")
+    missing = np.isnan(values)
+    out = np.where(missing, 0, values).astype("int64").tolist()
+    for i in np.flatnonzero(missing):
+        out[i] = None
+    return out
+
+
+def daily_returns(close):
+    # Percentage change from the previous close, 0 where the previous close
+    # is missing or not positive. The first element has no previous close.
+    close = np.asarray(close, dtype="float64")
+    prev = close[:-1]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        change = np.where(prev > 0, (close[1:] - prev) / prev * 100, 0.0)
+    return np.round(change, 2)
+
+
+def price_columns(price_data):
+    return {
+        "date": format_dates(price_data['report_date']),
+        "open": float_values(price_data['open']),
+        "high": float_values(price_data['high']),
+        "low": float_values(price_data['low']),
+        "close": float_values(price_data['close']),
+        "volume": int_values(price_data['volume'])
+    }
+
+
+def returns_columns(price_data):
+    close = price_data['close'].to_numpy(dtype="float64")
+    return {
+        "date": format_dates(price_data['report_date'].iloc[1:]),
+        "return": float_values(daily_returns(close)),
+        "close": float_values(close[1:])
+    }
+
+
+def columns_to_rows(columns):
+    # Row-oriented view over parallel columns: [{"date": ..., "close": ...}, ...]
+    keys = list(columns)
+    return [dict(zip(keys, row)) for row in zip(*columns.values())]
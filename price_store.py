@@ -0,0 +1,296 @@
+"""Persistent, memory-mapped store of daily price history.
+
+Each ticker lives in its own directory of flat binary columns::
+
+    price_store/AAPL/v3/report_date.bin   int64 days since epoch, ascending
+    price_store/AAPL/v3/open.bin          float64
+    ...
+    price_store/AAPL/meta.json            {"rows": n, "generation": 3, "refreshed_at": epoch seconds}
+
+Columns are opened with ``np.memmap`` so period and date-range reads only
+touch the rows they return. A stale ticker is refreshed by fetching the bars
+from its last stored date on and appending the new ones to the column files.
+If the refetched copy of the last stored bar differs from the stored one
+(a corrected bar, or a split or dividend re-adjusting the history), the
+whole history is fetched and written to a new generation directory instead.
+
+Readers take no lock: they read ``meta.json`` and map the generation it names.
+Appends only grow files past the rows any ``meta.json`` has published, and a
+rewrite never touches a published generation; ``meta.json`` is replaced last,
+and the previous generation is kept so readers holding the old meta can finish.
+Stores written before generations existed keep their columns in the ticker
+directory itself until their first rewrite.
+"""
+
+import json
+import logging
+import os
+import re
+import shutil
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to in-process locking only
+    fcntl = None
+
+
+logger = logging.getLogger(__name__)
+
+PRICE_COLUMNS = ("open", "high", "low", "close", "volume")
+DATE_COLUMN = "report_date"
+
+# Tickers become directory names, so anything path-like is rejected
+SAFE_TICKER = re.compile(r"[A-Z0-9][A-Z0-9.\-]{0,19}")
+GENERATION_DIR = re.compile(r"v(\d+)")
+
+
+class PriceStore:
+    def __init__(self, root, fetch_full, fetch_since, max_age_seconds=6 * 60 * 60):
+        # fetch_full(ticker) -> full price frame
+        # fetch_since(ticker, last_date) -> frame of bars on or after last_date
+        self.root = root
+        self.fetch_full = fetch_full
+        self.fetch_since = fetch_since
+        self.max_age_seconds = max_age_seconds
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+
+    # -----------------------------------------------------------
+    # Reads
+    # -----------------------------------------------------------
+
+    def load(self, ticker, last=None, start=None, end=None):
+        """Return stored bars for ``ticker``, refreshing them first when stale.
+
+        ``last`` keeps only the most recent N bars; ``start``/``end`` bound the
+        dates (inclusive) using a binary search over the sorted date column.
+        If the upstream refresh fails, whatever is already stored is served.
+        """
+        ticker = _check_ticker(ticker)
+        meta = self._read_meta(ticker)
+        if meta is None or time.time() - meta["refreshed_at"] > self.max_age_seconds:
+            try:
+                meta = self.refresh(ticker)
+            except Exception:
+                if meta is None:
+                    raise
+                logger.warning("price refresh failed ticker=%s; serving stored bars", ticker, exc_info=True)
+        return self._read_frame(ticker, meta, last=last, start=start, end=end)
+
+    def stored_bars(self, ticker):
+        """``(rows, last date)`` of what ``load`` would serve right now, without
+        refreshing; None when nothing is stored or the bars are due a refresh.
+        """
+        ticker = _check_ticker(ticker)
+        meta = self._read_meta(ticker)
+        if meta is None or meta["rows"] == 0 or time.time() - meta["refreshed_at"] > self.max_age_seconds:
+            return None
+        return meta["rows"], _to_timestamp(self._column(ticker, meta, DATE_COLUMN)[-1])
+
+    def _read_frame(self, ticker, meta, last=None, start=None, end=None):
+        rows = meta["rows"]
+        if rows == 0:
+            return _empty_frame()
+
+        dates = self._column(ticker, meta, DATE_COLUMN)
+        lo, hi = 0, rows
+        if start is not None:
+            lo = int(np.searchsorted(dates, _to_days(start), side="left"))
+        if end is not None:
+            hi = int(np.searchsorted(dates, _to_days(end), side="right"))
+        if last is not None:
+            lo = max(lo, hi - last)
+        if lo >= hi:
+            return _empty_frame()
+
+        frame = pd.DataFrame({
+            DATE_COLUMN: pd.to_datetime(np.array(dates[lo:hi]).astype("datetime64[D]")).as_unit("ns")
+        })
+        for column in PRICE_COLUMNS:
+            frame[column] = np.array(self._column(ticker, meta, column)[lo:hi])
+        frame.insert(0, "symbol", ticker)
+        return frame
+
+    # -----------------------------------------------------------
+    # Writes
+    # -----------------------------------------------------------
+
+    def refresh(self, ticker):
+        ticker = _check_ticker(ticker)
+        with self._lock(ticker):
+            # Another thread or worker may have refreshed while we waited
+            meta = self._read_meta(ticker)
+            if meta is not None and time.time() - meta["refreshed_at"] <= self.max_age_seconds:
+                return meta
+
+            if meta is None or meta["rows"] == 0:
+                return self._rewrite(ticker, self.fetch_full(ticker), meta)
+
+            last_date = _to_timestamp(self._column(ticker, meta, DATE_COLUMN)[-1])
+            frame = self.fetch_since(ticker, last_date)
+            if not self._last_bar_matches(ticker, meta, frame):
+                logger.info("stored prices changed upstream ticker=%s; rewriting history", ticker)
+                return self._rewrite(ticker, self.fetch_full(ticker), meta)
+            return self._append(ticker, frame, meta, after=last_date)
+
+    def _append(self, ticker, frame, meta, after):
+        # Readers only map the rows meta.json has published, so bytes past
+        # them (this append, or the tail of an interrupted one) are invisible
+        # until the new meta.json is in place
+        columns = _frame_columns(frame)
+        keep = columns[DATE_COLUMN] > _to_days(after)
+        columns = {name: values[keep] for name, values in columns.items()}
+
+        rows = meta["rows"]
+        directory = self._directory(ticker, meta)
+        for name, values in columns.items():
+            with open(os.path.join(directory, f"{name}.bin"), "r+b") as f:
+                f.truncate(rows * values.itemsize)
+                f.seek(0, os.SEEK_END)
+                f.write(values.tobytes())
+        return self._publish(ticker, rows + len(columns[DATE_COLUMN]), meta.get("generation"))
+
+    def _rewrite(self, ticker, frame, meta):
+        # A whole new history goes to a fresh generation directory, so a
+        # reader still holding the old meta.json keeps mapping the old files
+        generation = (meta or {}).get("generation", 0) + 1
+        directory = os.path.join(self.root, ticker, f"v{generation}")
+        shutil.rmtree(directory, ignore_errors=True)  # left by an interrupted rewrite
+        os.makedirs(directory)
+
+        columns = _frame_columns(frame)
+        for name, values in columns.items():
+            with open(os.path.join(directory, f"{name}.bin"), "wb") as f:
+                f.write(values.tobytes())
+        published = self._publish(ticker, len(columns[DATE_COLUMN]), generation)
+        self._drop_old_generations(ticker, generation)
+        return published
+
+    def _publish(self, ticker, rows, generation):
+        meta = {"rows": rows, "refreshed_at": time.time()}
+        if generation is not None:
+            meta["generation"] = generation
+        directory = os.path.join(self.root, ticker)
+        tmp_path = os.path.join(directory, "meta.json.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, os.path.join(directory, "meta.json"))
+        return meta
+
+    def _drop_old_generations(self, ticker, generation):
+        # Keep the generation before this one for readers that read meta.json
+        # just before it was replaced; anything older has no readers left
+        directory = os.path.join(self.root, ticker)
+        for entry in os.listdir(directory):
+            match = GENERATION_DIR.fullmatch(entry)
+            if match and int(match.group(1)) < generation - 1:
+                shutil.rmtree(os.path.join(directory, entry), ignore_errors=True)
+            elif generation > 1 and entry.endswith(".bin"):
+                os.remove(os.path.join(directory, entry))  # pre-generation layout
+
+    def _last_bar_matches(self, ticker, meta, frame):
+        # The fetched frame starts at the last stored date; that overlapping
+        # bar must be unchanged for an append to keep the history consistent
+        columns = _frame_columns(frame)
+        overlap = np.flatnonzero(columns[DATE_COLUMN] == self._column(ticker, meta, DATE_COLUMN)[-1])
+        if len(overlap) == 0:
+            return False
+        stored = np.array([self._column(ticker, meta, name)[-1] for name in PRICE_COLUMNS])
+        fetched = np.array([columns[name][overlap[0]] for name in PRICE_COLUMNS])
+        return bool(np.allclose(stored, fetched, rtol=1e-9, atol=0, equal_nan=True))
+
+    # -----------------------------------------------------------
+    # Helpers
+    # -----------------------------------------------------------
+
+    def _read_meta(self, ticker):
+        try:
+            with open(os.path.join(self.root, ticker, "meta.json")) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _directory(self, ticker, meta):
+        generation = meta.get("generation")
+        if generation is None:
+            return os.path.join(self.root, ticker)
+        return os.path.join(self.root, ticker, f"v{generation}")
+
+    def _column(self, ticker, meta, name):
+        dtype = "int64" if name == DATE_COLUMN else "float64"
+        path = os.path.join(self._directory(ticker, meta), f"{name}.bin")
+        return np.memmap(path, dtype=dtype, mode="r", shape=(meta["rows"],))
+
+    def _lock(self, ticker):
+        with self._locks_guard:
+            lock = self._locks.setdefault(ticker, threading.Lock())
+        return _TickerLock(lock, os.path.join(self.root, f".{ticker}.lock"))
+
+
+class _TickerLock:
+    # Serializes refreshes of one ticker across threads and, where fcntl is
+    # available, across worker processes sharing the same store directory.
+
+    def __init__(self, thread_lock, path):
+        self.thread_lock = thread_lock
+        self.path = path
+        self.file = None
+
+    def __enter__(self):
+        self.thread_lock.acquire()
+        if fcntl is not None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self.file = open(self.path, "w")
+            fcntl.flock(self.file, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        if self.file is not None:
+            fcntl.flock(self.file, fcntl.LOCK_UN)
+            self.file.close()
+            self.file = None
+        self.thread_lock.release()
+
+
+def _check_ticker(ticker):
+    ticker = ticker.upper()
+    if not SAFE_TICKER.fullmatch(ticker):
+        raise ValueError(f"Invalid ticker for price store: {ticker!r}")
+    return ticker
+
+
+def _frame_columns(frame):
+    if frame is None or frame.empty:
+        columns = {DATE_COLUMN: np.empty(0, dtype="int64")}
+        columns.update({name: np.empty(0, dtype="float64") for name in PRICE_COLUMNS})
+        return columns
+
+    frame = frame.assign(**{DATE_COLUMN: pd.to_datetime(frame[DATE_COLUMN])})
+    frame = frame.sort_values(DATE_COLUMN).drop_duplicates(DATE_COLUMN, keep="last")
+    columns = {
+        DATE_COLUMN: frame[DATE_COLUMN].to_numpy().astype("datetime64[D]").astype("int64")
+    }
+    for name in PRICE_COLUMNS:
+        columns[name] = frame[name].to_numpy(dtype="float64")
+    return columns
+
+
+def _to_days(value):
+    return np.datetime64(pd.Timestamp(value).date(), "D").astype("int64")
+
+
+def _to_timestamp(days):
+    return pd.Timestamp(np.datetime64(int(days), "D"))
+
+
+def _empty_frame():
+    frame = pd.DataFrame({"symbol": pd.Series(dtype=object),
+                          DATE_COLUMN: pd.Series(dtype="datetime64[ns]")})
+    for column in PRICE_COLUMNS:
+        frame[column] = pd.Series(dtype="float64")
+    return frame
@@ -0,0 +1,86 @@
+"""Vectorized covariance, beta and correlation over many tickers at once."""
+
+import numpy as np
+import pandas as pd
+
+
+TRADING_DAYS = 252
+
+
+def aligned_closes(frames, last=None):
+    """Align close prices of ``frames`` (symbol -> price frame) on shared dates.
+
+    Returns a date-indexed DataFrame with one column per symbol, holding only
+    the dates every symbol traded, optionally limited to the last N of them.
+    """
+    closes = pd.concat(
+        {symbol: close_series(frame) for symbol, frame in frames.items()},
+        axis=1, join="inner"
+    ).sort_index().dropna()
+    if last is not None:
+        closes = closes.tail(last)
+    return closes
+
+
+def close_series(frame):
+    # One symbol's closes indexed by date, sorted, last row winning on duplicates
+    return frame.drop_duplicates('report_date', keep='last').set_index('report_date')['close'].sort_index().dropna()
+
+
+def daily_returns_matrix(closes):
+    # (n - 1) x k matrix of simple daily returns
+    values = closes.to_numpy(dtype="float64")
+    return values[1:] / values[:-1] - 1
+
+
+def risk_matrix(returns):
+    """Covariance, correlation and annualized volatility of a returns matrix."""
+    covariance = np.cov(returns, rowvar=False, ddof=1)
+    covariance = np.atleast_2d(covariance)
+    std = np.sqrt(np.diag(covariance))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        correlation = covariance / np.outer(std, std)
+    return {
+        "covariance": covariance,
+        "correlation": correlation,
+        "volatility": std * np.sqrt(TRADING_DAYS),
+    }
+
+
+def betas(covariance, asset_index, benchmark_index):
+    # beta[i, j] = cov(asset_i, benchmark_j) / var(benchmark_j)
+    cov = covariance[np.ix_(asset_index, benchmark_index)]
+    variance = np.diag(covariance)[benchmark_index]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return cov / variance
+
+
+def rolling_betas(returns, asset_index, benchmark_index, window):
+    """Rolling-window betas of every asset against every benchmark.
+
+    Uses cumulative sums so each window is O(1) instead of re-running a
+    covariance per window. Returns an array shaped
+    (len(benchmark_index), n - window + 1, len(asset_index)).
+    """
+    n = returns.shape[0]
+    if window < 2 or n < window:
+        return np.empty((len(benchmark_index), 0, len(asset_index)))
+
+    def window_sums(values):
+        cumulative = np.cumsum(values, axis=0)
+        cumulative = np.concatenate([np.zeros((1,) + values.shape[1:]), cumulative])
+        return cumulative[window:] - cumulative[:-window]
+
+    assets = returns[:, asset_index]
+    sum_x = window_sums(assets)
+    result = []
+    for j in benchmark_index:
+        market = returns[:, j]
+        sum_y = window_sums(market)
+        sum_yy = window_sums(market * market)
+        sum_xy = window_sums(assets * market[:, None])
+        cov = (sum_xy - sum_x * sum_y[:, None] / window) / (window - 1)
+        var = (sum_yy - sum_y * sum_y / window) / (window - 1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            result.append(cov / var[:, None])
+    return np.stack(result)
@@ -0,0 +1,147 @@
+"""Node-wide cache shared by every worker process, stored in a SQLite (WAL) file."""
+
+import io
+import logging
+import sqlite3
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+
+class SharedCache:
+    """TTL cache of byte values that all processes on a node read and write.
+
+    Every gunicorn worker opens the same SQLite file, so an entry stored by
+    one worker is a hit for all of them. Entries expire after their TTL.
+    When the stored values exceed ``max_bytes``, expired entries are removed
+    first and then the least recently read ones. Read times are only written
+    back once per ``touch_interval`` seconds per entry, so hits rarely need
+    the write lock.
+
+    The cache is best effort: a locked or unreadable database counts as a
+    miss and a failed write is skipped, so callers never fail because of it.
+    """
+
+    def __init__(self, path, max_bytes=512 * 1024 * 1024, busy_timeout=0.5, touch_interval=60):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.busy_timeout = busy_timeout
+        self.touch_interval = touch_interval
+        self._local = threading.local()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        now = time.time()
+        try:
+            conn = self._conn()
+            row = conn.execute(
+                'SELECT value, expires_at, accessed_at FROM cache WHERE key = ?', (key,)
+            ).fetchone()
+            if row is None or row[1] <= now:
+                self.misses += 1
+                return None
+            if now - row[2] >= self.touch_interval:
+                with conn:
+                    conn.execute('UPDATE cache SET accessed_at = ? WHERE key = ?', (now, key))
+        except sqlite3.Error as e:
+            logger.warning("shared cache read failed key=%s error=%r", key, e)
+            self.misses += 1
+            return None
+        self.hits += 1
+        return row[0]
+
+    def put(self, key, value, ttl_seconds):
+        now = time.time()
+        try:
+            conn = self._conn()
+            with conn:
+                conn.execute('''
+                    INSERT OR REPLACE INTO cache (key, value, nbytes, expires_at, accessed_at)
+                    VALUES (?, ?, ?, ?, ?)
+                ''', (key, sqlite3.Binary(value), len(value), now + ttl_seconds, now))
+                self._evict(conn, now)
+        except sqlite3.Error as e:
+            logger.warning("shared cache write failed key=%s error=%r", key, e)
+
+    def invalidate(self, key=None):
+        try:
+            with self._conn() as conn:
+                if key is None:
+                    conn.execute('DELETE FROM cache')
+                else:
+                    conn.execute('DELETE FROM cache WHERE key = ?', (key,))
+        except sqlite3.Error as e:
+            logger.warning("shared cache invalidate failed key=%s error=%r", key, e)
+
+    def stats(self):
+        entries, nbytes = self._conn().execute('SELECT COUNT(*), COALESCE(SUM(nbytes), 0) FROM cache').fetchone()
+        return {
+            "entries": entries,
+            "bytes": nbytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    def _evict(self, conn, now):
+        total = conn.execute('SELECT COALESCE(SUM(nbytes), 0) FROM cache').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        total -= sum(n for (n,) in conn.execute('SELECT nbytes FROM cache WHERE expires_at <= ?', (now,)))
+        self.evictions += conn.execute('DELETE FROM cache WHERE expires_at <= ?', (now,)).rowcount
+
+        # Least recently read first, until the cache is back under its limit
+        victims = []
+        for key, nbytes in conn.execute('SELECT key, nbytes FROM cache ORDER BY accessed_at'):
+            if total <= self.max_bytes:
+                break
+            victims.append((key,))
+            total -= nbytes
+        conn.executemany('DELETE FROM cache WHERE key = ?', victims)
+        self.evictions += len(victims)
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # The file and schema are created on first use, not at import
+            conn = sqlite3.connect(self.path, timeout=self.busy_timeout)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            with conn:
+                conn.execute('''
+                    CREATE TABLE IF NOT EXISTS cache (
+                        key TEXT PRIMARY KEY,
+                        value BLOB NOT NULL,
+                        nbytes INTEGER NOT NULL,
+                        expires_at REAL NOT NULL,
+                        accessed_at REAL NOT NULL
+                    )
+                ''')
+                conn.execute('CREATE INDEX IF NOT EXISTS idx_cache_accessed_at ON cache (accessed_at)')
+            self._local.conn = conn
+        return conn
+
+
+def encode_frame(frame):
+    """Serialize a DataFrame of numeric, datetime and string columns without pickle."""
+    arrays = {}
+    for name in frame.columns:
+        values = frame[name].to_numpy()
+        arrays[name] = values.astype(str) if values.dtype == object else values
+    buffer = io.BytesIO()
+    np.savez(buffer, **arrays)
+    return buffer.getvalue()
+
+
+def decode_frame(data):
+    with np.load(io.BytesIO(data), allow_pickle=False) as arrays:
+        return pd.DataFrame({
+            name: arrays[name].astype(object) if arrays[name].dtype.kind == "U" else arrays[name]
+            for name in arrays.files
+        })
@@ -0,0 +1,79 @@
+"""Single-flight call coalescing: concurrent calls for the same key share one execution."""
+
+import threading
+import time
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.started = time.monotonic()
+
+
+class SingleFlight:
+    """Collapse concurrent calls with the same key into one in-flight call.
+
+    The first caller for a key (the leader) runs the function; callers that
+    arrive while it is running wait for it and receive the same result, or
+    the same exception. Nothing is cached once the call finishes, so the
+    next caller after that starts a fresh call.
+
+    ``on_call(source, coalesced)`` is invoked for every caller, with
+    ``coalesced`` true for callers that shared another caller's result.
+    Keys are ``(source, ...)`` tuples so counters can be broken down by
+    source.
+
+    With ``max_age`` (seconds), a call running longer than that is no longer
+    joined: a hung upstream call would otherwise hold every later caller for
+    its key. New callers start a call of their own, and callers already
+    waiting stop waiting at that point and do the same.
+    """
+
+    def __init__(self, on_call=None, max_age=None):
+        self.on_call = on_call
+        self.max_age = max_age
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn, *args, **kwargs):
+        while True:
+            with self._lock:
+                call = self._calls.get(key)
+                if call is not None and self._expired(call):
+                    call = None
+                leader = call is None
+                if leader:
+                    call = self._calls[key] = _Call()
+
+            if self.on_call is not None:
+                self.on_call(key[0], not leader)
+
+            if leader:
+                break
+            timeout = None if self.max_age is None else max(0, call.started + self.max_age - time.monotonic())
+            if call.done.wait(timeout):
+                if call.error is not None:
+                    raise call.error
+                return call.result
+
+        try:
+            call.result = fn(*args, **kwargs)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                # A newer call may have replaced this one after it expired
+                if self._calls.get(key) is call:
+                    del self._calls[key]
+            call.done.set()
+
+    def _expired(self, call):
+        return self.max_age is not None and time.monotonic() - call.started >= self.max_age
+
+    def in_flight(self):
+        with self._lock:
+            return len(self._calls)
@@ -0,0 +1,110 @@
+"""Parsed, indexed financial statements cached until the next expected earnings report."""
+
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+
+# Days between fiscal period ends, per statement type
+PERIOD_DAYS = {"quarterly": 91, "annual": 365}
+
+
+class IndexedStatement:
+    """A DefeatBeta statement frame as a Breakdown -> period -> value lookup.
+
+    ``periods`` keeps the frame's column order (``TTM`` first when present,
+    then fiscal periods newest first). ``fiscal_period`` is the newest
+    dated period end, used to predict when the next report is due.
+    """
+
+    def __init__(self, frame):
+        self.periods = [column for column in frame.columns if column != "Breakdown"]
+        self.values = {}
+        for label, row in zip(frame["Breakdown"], frame[self.periods].to_numpy(dtype=object)):
+            # First row wins when a label repeats
+            self.values.setdefault(label, dict(zip(self.periods, row)))
+
+        dated = pd.to_datetime(pd.Series(self.periods, dtype=object), format="%Y-%m-%d", errors="coerce").dropna()
+        self.fiscal_period = dated.max().to_pydatetime() if not dated.empty else None
+
+    def get(self, item, period):
+        return self.values.get(item, {}).get(period)
+
+    def ttm(self, item):
+        return self.get(item, "TTM")
+
+    def latest(self, item):
+        # Value in the first column after Breakdown
+        return self.get(item, self.periods[0]) if self.periods else None
+
+
+class StatementCache:
+    """LRU cache of ``IndexedStatement`` per (ticker, statement type).
+
+    Statements only change when a company reports, so an entry lives for
+    ``ttl_seconds`` (days) until its next report is expected: one period
+    after its newest fiscal period plus ``report_lag_days[0]``. From then
+    until ``report_lag_days[1]`` (the earnings window) entries expire after
+    ``earnings_ttl_seconds`` so a new filing is picked up quickly. Missing
+    statements are cached for ``earnings_ttl_seconds`` too.
+
+    ``loader(ticker, kind)`` returns an ``IndexedStatement`` or ``None``.
+    """
+
+    def __init__(self, loader, ttl_seconds=7 * 24 * 60 * 60, earnings_ttl_seconds=6 * 60 * 60,
+                 report_lag_days=(20, 60), max_entries=1024):
+        self.loader = loader
+        self.ttl_seconds = ttl_seconds
+        self.earnings_ttl_seconds = earnings_ttl_seconds
+        self.report_lag_days = report_lag_days
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # (ticker, kind) -> (expires_at, statement)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, ticker, kind):
+        key = (ticker.upper(), kind)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.time() < entry[0]:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        statement = self.loader(ticker, kind)
+        with self._lock:
+            self._entries[key] = (time.time() + self.lifetime(statement, kind), statement)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return statement
+
+    def lifetime(self, statement, kind, now=None):
+        if statement is None or statement.fiscal_period is None:
+            return self.earnings_ttl_seconds
+        now = now or datetime.now()
+        next_period_end = statement.fiscal_period + timedelta(days=PERIOD_DAYS[kind])
+        window_start = next_period_end + timedelta(days=self.report_lag_days[0])
+        window_end = next_period_end + timedelta(days=self.report_lag_days[1])
+        if now < window_start:
+            return max(min(self.ttl_seconds, (window_start - now).total_seconds()), self.earnings_ttl_seconds)
+        if now <= window_end:
+            return self.earnings_ttl_seconds
+        return self.ttl_seconds
+
+    def invalidate(self, ticker=None):
+        with self._lock:
+            if ticker is None:
+                self._entries.clear()
+                return
+            for key in [k for k in self._entries if k[0] == ticker.upper()]:
+                del self._entries[key]
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
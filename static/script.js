@@ -114,6 +114,28 @@ const errorMessage = document.getElementById('errorMessage');
 const resultBox = document.getElementById('resultBox');
 const notesContainer = document.getElementById('notesContainer');
 
+// Ticker typeahead from the local symbol index
+const tickerSuggestions = document.getElementById('tickerSuggestions');
+let suggestTimer = null;
+
+tickerInput.addEventListener('input', () => {
+  clearTimeout(suggestTimer);
+  const prefix = tickerInput.value.trim();
+  if (!prefix || !tickerSuggestions) return;
+  suggestTimer = setTimeout(async () => {
+    try {
+      const response = await fetch(`/symbols?prefix=${encodeURIComponent(prefix)}&limit=8`);
+      if (!response.ok) return;
+      const data = await response.json();
+      tickerSuggestions.innerHTML = data.symbols.map(s =>
+        `<option value="${s.ticker}">${s.name ? `${s.name} (${s.exchange})` : s.exchange}</option>`
+      ).join('');
+    } catch (error) {
+      console.error('Symbol lookup failed:', error);
+    }
+  }, 150);
+});
+
 // Tab handling
 const tabs = document.querySelectorAll('.tab');
 const tabContents = document.querySelectorAll('.tab-content');
@@ -137,6 +159,14 @@ function showError(message) {
   }, 5000);
 }
 
+// Drop the sections streamed in for a search that then failed, so the
+// error is not shown next to partial data for an unknown symbol
+function hidePartialResults() {
+  resultBox.style.display = 'none';
+  document.getElementById('outlook').innerHTML = '';
+  document.getElementById('summary').innerHTML = '';
+}
+
 function clearResults() {
   resultBox.style.display = 'none';
   tickerInput.value = '';
@@ -328,7 +358,7 @@ function initializePriceHistoryChart(ticker, period = '1y') {
     ctx.parentNode.appendChild(loadingDiv);
 
     // Fetch historical data
-    fetch(`/historical?ticker=${ticker}&period=${period}`)
+    fetch(`/historical?ticker=${ticker}&period=${period}&format=columnar`)
       .then(response => response.json())
       .then(data => {
         if (data.error) {
@@ -339,9 +369,9 @@ function initializePriceHistoryChart(ticker, period = '1y') {
         loadingDiv.remove();
         ctx.style.display = 'block';
 
-        const dates = data.data.map(item => item.date);
-        const closes = data.data.map(item => item.close);
-        const volumes = data.data.map(item => item.volume);
+        const dates = data.data.date;
+        const closes = data.data.close;
+        const volumes = data.data.volume;
 
         // Create gradient for the line
         const gradient = ctx.getContext('2d').createLinearGradient(0, 0, 0, 400);
@@ -405,13 +435,16 @@ function initializePriceHistoryChart(ticker, period = '1y') {
               tooltip: {
                 callbacks: {
                   label: function(context) {
-                    return 'Price: $' + context.parsed.y.toFixed(2);
+                    const name = context.datasetIndex === 0 ? 'Price' : context.dataset.label;
+                    return name + ': $' + context.parsed.y.toFixed(2);
                   }
                 }
               }
             }
           }
         });
+
+        addIndicatorOverlays(window.priceHistoryChart, ticker, period, dates);
       })
       .catch(error => {
         console.error('Error loading price history:', error);
@@ -422,6 +455,40 @@ function initializePriceHistoryChart(ticker, period = '1y') {
   }
 }
 
+// Overlay the moving average and Bollinger bands from /indicators on the price chart
+function addIndicatorOverlays(chart, ticker, period, dates) {
+  fetch(`/indicators?tickers=${ticker}&period=${period}&indicators=sma,bollinger`)
+    .then(response => response.json())
+    .then(data => {
+      if (data.error || !data.data[ticker] || window.priceHistoryChart !== chart) {
+        return;
+      }
+
+      // /historical leaves out the latest bar, so line the values up by date
+      const index = new Map(data.date.map((date, i) => [date, i]));
+      const series = data.data[ticker];
+      const align = values => dates.map(date => (index.has(date) ? values[index.get(date)] : null));
+      const overlay = (label, values, color, dash) => ({
+        label,
+        data: align(values),
+        borderColor: color,
+        borderWidth: 1,
+        borderDash: dash,
+        fill: false,
+        pointRadius: 0,
+        tension: 0.1
+      });
+
+      chart.data.datasets.push(
+        overlay(`SMA ${data.window}`, series.sma, 'rgba(255, 159, 64, 1)', []),
+        overlay('Upper Band', series.bollinger_upper, 'rgba(153, 102, 255, 0.8)', [4, 4]),
+        overlay('Lower Band', series.bollinger_lower, 'rgba(153, 102, 255, 0.8)', [4, 4])
+      );
+      chart.update();
+    })
+    .catch(error => console.error('Error loading indicators:', error));
+}
+
 // Initialize Daily Returns Chart
 function initializeReturnsChart(ticker, period = '1y') {
   try {
@@ -444,7 +511,7 @@ function initializeReturnsChart(ticker, period = '1y') {
     ctx.parentNode.appendChild(loadingDiv);
 
     // Fetch returns data
-    fetch(`/returns?ticker=${ticker}&period=${period}`)
+    fetch(`/returns?ticker=${ticker}&period=${period}&format=columnar`)
       .then(response => response.json())
       .then(data => {
         if (data.error) {
@@ -455,8 +522,8 @@ function initializeReturnsChart(ticker, period = '1y') {
         loadingDiv.remove();
         ctx.style.display = 'block';
 
-        const dates = data.data.map(item => item.date);
-        const returns = data.data.map(item => item.return);
+        const dates = data.data.date;
+        const returns = data.data.return;
 
         // Color bars based on positive/negative returns
         const colors = returns.map(ret => ret >= 0 ? 'rgba(75, 192, 75, 0.8)' : 'rgba(255, 99, 132, 0.8)');
@@ -858,6 +925,39 @@ function createHistoryList(history) {
   `;
 }
 
+// Reads /search/stream (one JSON document per line) and calls onSection for
+// every section; resolves with the final "done" or "error" line
+async function streamSearch(ticker, onSection) {
+  const response = await fetch(`/search/stream?ticker=${encodeURIComponent(ticker)}`);
+  if (!response.ok) {
+    const data = await response.json();
+    return { section: 'error', error: data.error };
+  }
+
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffered = '';
+  let last = null;
+
+  const handleLine = line => {
+    if (!line.trim()) return;
+    last = JSON.parse(line);
+    if (last.section !== 'error') onSection(last);
+  };
+
+  while (true) {
+    const { done, value } = await reader.read();
+    if (done) break;
+    buffered += decoder.decode(value, { stream: true });
+    const lines = buffered.split('\n');
+    buffered = lines.pop();
+    lines.forEach(handleLine);
+  }
+  handleLine(buffered);
+
+  return last || { section: 'error', error: 'Failed to fetch stock data' };
+}
+
 // Event Listeners
 stockForm.addEventListener('submit', async (e) => {
   e.preventDefault();
@@ -874,14 +974,14 @@ stockForm.addEventListener('submit', async (e) => {
   errorMessage.style.display = 'none';
 
   try {
-    const response = await fetch(`/search?ticker=${ticker}`);
-    const data = await response.json();
-
-    if (response.ok) {
+    // Render each section as it arrives; the last line is the full result
+    const data = await streamSearch(ticker, section => {
       resultBox.style.display = 'block';
-      document.getElementById('outlook').innerHTML = createCompanyOutlook(data.company, data.stock);
-      document.getElementById('summary').innerHTML = createStockSummary(data.stock);
-      
+      document.getElementById('outlook').innerHTML = createCompanyOutlook(section.company, section.stock);
+      document.getElementById('summary').innerHTML = createStockSummary(section.stock);
+    });
+
+    if (data.section === 'done') {
       // Store latest price for portfolio calculations
       if (data.stock && data.stock.last_close) {
         setLatestPrice(ticker, data.stock.last_close);
@@ -905,9 +1005,11 @@ stockForm.addEventListener('submit', async (e) => {
       document.getElementById('history').innerHTML = createHistoryList([]);
       await loadHistory();
     } else {
+      hidePartialResults();
       showError(data.error || 'Failed to fetch stock data');
     }
   } catch (error) {
+    hidePartialResults();
     showError('An error occurred while fetching data');
     console.error('Error:', error);
   } finally {
@@ -1061,6 +1163,26 @@ function renderWatchlist() {
   });
 }
 
+// Refresh every watchlist price with a single batch request
+async function refreshWatchlistPrices() {
+  const list = getWatchlist();
+  if (list.length === 0) return;
+
+  try {
+    const batch = await fetchCompanyDataBatch(list, false, true);
+    list.forEach(ticker => {
+      const result = batch.results[ticker];
+      if (result && !result.error && result.stock && result.stock.last_close) {
+        setLatestPrice(ticker, result.stock.last_close);
+      }
+    });
+    renderWatchlist();
+    updatePortfolioSummary();
+  } catch (error) {
+    console.error('Failed to refresh watchlist prices:', error);
+  }
+}
+
 // Add event listener for the watchlist button
 document.addEventListener('DOMContentLoaded', function() {
   const addToWatchlistBtn = document.getElementById('addToWatchlistBtn');
@@ -1079,8 +1201,9 @@ document.addEventListener('DOMContentLoaded', function() {
     };
   }
   
-  // Initial render of watchlist
+  // Initial render of watchlist, then refresh its prices in the background
   renderWatchlist();
+  refreshWatchlistPrices();
 });
 
 // --- Notes/Tags Feature ---
@@ -1365,20 +1488,69 @@ function calculatePortfolioValue() {
   return total;
 }
 
-function updatePortfolioSummary() {
-  const totalValue = calculatePortfolioValue();
+// Holdings, P&L and value history computed server-side from the
+// transaction list; null when the portfolio is empty or the call fails
+async function fetchPortfolioValuation() {
+  const portfolio = getPortfolio();
+  if (portfolio.length === 0) return null;
+  try {
+    const response = await fetch('/portfolio/valuation', {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({ transactions: portfolio })
+    });
+    if (!response.ok) return null;
+    const valuation = await response.json();
+    valuation.holdings.forEach(h => {
+      if (h.last_price !== null) setLatestPrice(h.ticker, h.last_price);
+    });
+    return valuation;
+  } catch (error) {
+    console.error('Error valuing portfolio:', error);
+    return null;
+  }
+}
+
+async function updatePortfolioSummary() {
   const totalValueElement = document.getElementById('totalPortfolioValue');
   const totalReturnElement = document.getElementById('totalPortfolioReturn');
   
+  // Show the local estimate straight away, then replace it with server numbers
   if (totalValueElement) {
-    totalValueElement.textContent = formatCurrency(totalValue);
+    totalValueElement.textContent = formatCurrency(calculatePortfolioValue());
+  }
+
+  const valuation = await fetchPortfolioValuation();
+  if (!valuation) return;
+
+  if (totalValueElement) {
+    totalValueElement.textContent = formatCurrency(valuation.totals.market_value);
   }
   
-  if (totalReturnElement) {
-    // For now, we'll show a placeholder return value
-    // In a real implementation, you'd calculate actual returns
-    totalReturnElement.textContent = '0.00%';
-    totalReturnElement.className = 'value';
+  if (totalReturnElement && valuation.totals.return_percent !== null) {
+    const returnPercent = valuation.totals.return_percent;
+    totalReturnElement.textContent = `${returnPercent >= 0 ? '+' : ''}${returnPercent.toFixed(2)}%`;
+    totalReturnElement.className = `value ${returnPercent >= 0 ? 'positive' : 'negative'}`;
+  }
+}
+
+function renderPortfolioHoldings(valuation) {
+  const body = document.getElementById('portfolioHoldingsBody');
+  const valueElement = document.getElementById('portfolioModalValue');
+  if (!body || !valuation) return;
+  const money = v => v !== null ? '$' + v.toFixed(2) : 'N/A';
+  body.innerHTML = valuation.holdings.filter(h => h.shares > 0).map(h => `
+    <tr>
+      <td>${h.ticker}</td>
+      <td>${h.shares}</td>
+      <td>${money(h.avg_cost)}</td>
+      <td>${money(h.last_price)}</td>
+      <td>${money(h.market_value)}</td>
+      <td style="color:${h.unrealized_pnl >= 0 ? 'var(--success-color)' : 'var(--error-color)'};">${money(h.unrealized_pnl)}</td>
+    </tr>
+  `).join('');
+  if (valueElement) {
+    valueElement.textContent = money(valuation.totals.market_value);
   }
 }
 
@@ -1462,9 +1634,10 @@ function renderPortfolioModal() {
               <th>Avg Cost</th>
               <th>Last Price</th>
               <th>Value</th>
+              <th>Unrealized P&amp;L</th>
             </tr>
           </thead>
-          <tbody>
+          <tbody id="portfolioHoldingsBody">
             ${Object.keys(holdings).filter(t=>holdings[t].shares>0).map(ticker => {
               const shares = holdings[ticker].shares;
               const avgCost = shares > 0 ? (holdings[ticker].cost / shares) : 0;
@@ -1476,6 +1649,7 @@ function renderPortfolioModal() {
                 <td>$${avgCost.toFixed(2)}</td>
                 <td>${lastPrice !== 'N/A' ? '$'+lastPrice.toFixed(2) : 'N/A'}</td>
                 <td>${lastPrice !== 'N/A' ? '$'+value.toFixed(2) : 'N/A'}</td>
+                <td>N/A</td>
               </tr>`;
             }).join('')}
           </tbody>
@@ -1484,7 +1658,7 @@ function renderPortfolioModal() {
 
       <div style="display:flex;justify-content:space-between;align-items:center;background:var(--hover-color);padding:1rem;border-radius:0.5rem;margin-bottom:1rem;">
         <span style="font-weight:600;font-size:1.1rem;">Portfolio Value:</span>
-        <span style="font-weight:600;font-size:1.1rem;color:var(--primary-color);">$${value.toFixed(2)}</span>
+        <span style="font-weight:600;font-size:1.1rem;color:var(--primary-color);" id="portfolioModalValue">$${value.toFixed(2)}</span>
       </div>
 
       <button onclick="document.getElementById('portfolioModal').remove();" class="btn-secondary" style="width:100%;">Close</button>
@@ -1509,6 +1683,8 @@ function renderPortfolioModal() {
       };
     }
   }, 100);
+  // Replace the local estimate with server-side valuation once it arrives
+  fetchPortfolioValuation().then(renderPortfolioHoldings);
 }
 
 // Add Portfolio button to UI
@@ -1663,17 +1839,14 @@ function renderComparisonModal() {
         }
 
         try {
-          const results = await Promise.all([
-            fetchCompanyData(ticker1),
-            fetchCompanyData(ticker2),
-            ticker3 ? fetchCompanyData(ticker3) : null
-          ].filter(Boolean));
+          const tickers = [ticker1, ticker2, ticker3].filter(Boolean);
+          const batch = await fetchCompanyDataBatch(tickers);
 
-          if (results.some(r => !r.ok)) {
+          if (tickers.some(t => !batch.results[t] || batch.results[t].error)) {
             throw new Error('Failed to fetch data for one or more companies');
           }
 
-          const companies = await Promise.all(results.map(r => r.json()));
+          const companies = tickers.map(t => batch.results[t]);
           displayComparisonResults(companies);
         } catch (error) {
           showError(error.message);
@@ -1699,12 +1872,18 @@ function renderComparisonModal() {
   }, 100);
 }
 
-async function fetchCompanyData(ticker) {
-  const response = await fetch(`/search?ticker=${ticker}`);
+// Fetch several tickers in one request; each ticker gets a result or an error slot.
+// Watchlist polls get only each ticker's quote (no Tiingo calls) and mark their
+// tickers as watched so the server precomputes them.
+async function fetchCompanyDataBatch(tickers, recordHistory = true, watchlist = false) {
+  const params = new URLSearchParams({ tickers: tickers.join(',') });
+  if (!recordHistory) params.set('history', '0');
+  if (watchlist) params.set('watch', '1');
+  const response = await fetch(`/search/batch?${params}`);
   if (!response.ok) {
-    throw new Error(`Failed to fetch data for ${ticker}`);
+    throw new Error(`Failed to fetch data for ${tickers.join(', ')}`);
   }
-  return response;
+  return response.json();
 }
 
 function displayComparisonResults(companies) {
@@ -0,0 +1,107 @@
+"""Local ticker universe: sorted symbol and name arrays for prefix lookups and validation."""
+
+import bisect
+import csv
+import io
+import os
+import zipfile
+from datetime import datetime, timedelta, timezone
+
+import requests
+
+
+TIINGO_SUPPORTED_TICKERS_URL = "https://apimedia.tiingo.com/docs/tiingo/daily/supported_tickers.zip"
+LISTED_EXCHANGES = {"NYSE", "NASDAQ", "NYSE ARCA", "NYSE MKT", "AMEX", "BATS"}
+LISTED_ASSET_TYPES = {"Stock", "ETF"}
+
+
+class SymbolIndex:
+    """Sorted arrays of tickers and lower-cased names with binary-search prefix lookups.
+
+    ``complete`` says whether the file holds the whole listed universe (as
+    written by ``refresh_symbols``). Only a complete index can reject a
+    well-formed ticker as unknown; the bundled seed list is not complete.
+    """
+
+    def __init__(self, rows, complete=False):
+        rows = sorted({row[0].upper(): row for row in rows}.values())
+        self.tickers = [row[0].upper() for row in rows]
+        self.names = [row[1] for row in rows]
+        self.exchanges = [row[2] for row in rows]
+        self.complete = complete
+        by_name = sorted((name.lower(), i) for i, name in enumerate(self.names) if name)
+        self._name_keys = [key for key, _ in by_name]
+        self._name_rows = [i for _, i in by_name]
+
+    def __len__(self):
+        return len(self.tickers)
+
+    def __contains__(self, ticker):
+        i = bisect.bisect_left(self.tickers, ticker)
+        return i < len(self.tickers) and self.tickers[i] == ticker
+
+    def search(self, prefix, limit=10):
+        """Tickers starting with ``prefix``, then companies whose name does."""
+        matches = list(self._prefix_range(self.tickers, range(len(self.tickers)), prefix.upper(), limit))
+        if len(matches) < limit and prefix.strip():
+            seen = set(matches)
+            for i in self._prefix_range(self._name_keys, self._name_rows, prefix.lower(), limit):
+                if i not in seen and len(matches) < limit:
+                    matches.append(i)
+        return [{"ticker": self.tickers[i], "name": self.names[i], "exchange": self.exchanges[i]} for i in matches]
+
+    @staticmethod
+    def _prefix_range(keys, rows, prefix, limit):
+        start = bisect.bisect_left(keys, prefix)
+        for position in range(start, min(start + limit, len(keys))):
+            if not keys[position].startswith(prefix):
+                break
+            yield rows[position]
+
+    @classmethod
+    def load(cls, path):
+        """Read ``ticker,name,exchange`` rows; ``# complete=1`` marks a full universe."""
+        if not os.path.exists(path):
+            return cls([])
+        with open(path, newline="", encoding="utf-8") as f:
+            lines = f.read().splitlines()
+        complete = any("complete=1" in line for line in lines if line.startswith("#"))
+        rows = [
+            (row["ticker"].strip().upper(), row.get("name") or "", row.get("exchange") or "")
+            for row in csv.DictReader(line for line in lines if not line.startswith("#"))
+            if row.get("ticker")
+        ]
+        return cls(rows, complete=complete)
+
+
+def refresh_symbols(path, active_within_days=30, timeout=60):
+    """Rebuild ``path`` from Tiingo's supported-tickers list (run offline, e.g. from cron).
+
+    Keeps US-listed stocks and ETFs that traded within ``active_within_days``.
+    Tiingo's list has no company names, so names already in the file are kept.
+    Returns the number of symbols written.
+    """
+    existing = SymbolIndex.load(path)
+    names = dict(zip(existing.tickers, existing.names))
+
+    response = requests.get(TIINGO_SUPPORTED_TICKERS_URL, timeout=timeout)
+    response.raise_for_status()
+    with zipfile.ZipFile(io.BytesIO(response.content)) as archive:
+        text = archive.read(archive.namelist()[0]).decode("utf-8")
+
+    cutoff = (datetime.now(timezone.utc) - timedelta(days=active_within_days)).strftime("%Y-%m-%d")
+    rows = {}
+    for row in csv.DictReader(io.StringIO(text)):
+        ticker = (row.get("ticker") or "").strip().upper()
+        if (ticker and row.get("exchange") in LISTED_EXCHANGES and row.get("assetType") in LISTED_ASSET_TYPES
+                and row.get("priceCurrency") == "USD" and (row.get("endDate") or "") >= cutoff):
+            rows[ticker] = (ticker, names.get(ticker, ""), row["exchange"])
+
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", newline="", encoding="utf-8") as f:
+        f.write(f"# source=tiingo-supported-tickers refreshed={datetime.now(timezone.utc).date()} complete=1\n")
+        writer = csv.writer(f)
+        writer.writerow(["ticker", "name", "exchange"])
+        writer.writerows(sorted(rows.values()))
+    os.replace(tmp, path)
+    return len(rows)
@@ -0,0 +1,104 @@
+"""IndicatorSeries math against pandas references, and IndicatorCache hits, extends and misses."""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from indicators import (  # noqa: E402
+    INDICATORS, MACD_SLOW, RSI_PERIOD, TRADING_DAYS, IndicatorCache, IndicatorSeries,
+)
+
+
+def closes(n=120, seed=7):
+    rng = np.random.default_rng(seed)
+    return 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+
+
+def dates(n=120):
+    return pd.bdate_range(end="2026-10-16", periods=n).to_numpy()
+
+
+def test_moving_averages_match_pandas():
+    values = closes()
+    series = IndicatorSeries(values, window=20)
+    reference = pd.Series(values)
+
+    np.testing.assert_allclose(series.columns["sma"], reference.rolling(20).mean(), equal_nan=True)
+    ema = reference.ewm(span=20, adjust=False).mean().to_numpy().copy()
+    ema[:19] = np.nan
+    np.testing.assert_allclose(series.columns["ema"], ema, equal_nan=True)
+
+    std = reference.rolling(20).std(ddof=0)
+    np.testing.assert_allclose(series.columns["bollinger_upper"], reference.rolling(20).mean() + 2 * std, equal_nan=True)
+
+    volatility = reference.pct_change().rolling(20).std() * np.sqrt(TRADING_DAYS)
+    np.testing.assert_allclose(series.columns["volatility"], volatility, equal_nan=True)
+
+
+def test_warm_up_and_rsi_bounds():
+    series = IndicatorSeries(closes(), window=20)
+    rsi = series.columns["rsi"]
+    assert np.isnan(rsi[:RSI_PERIOD]).all()
+    assert ((rsi[RSI_PERIOD:] >= 0) & (rsi[RSI_PERIOD:] <= 100)).all()
+    assert np.isnan(series.columns["macd"][:MACD_SLOW - 1]).all()
+    assert not np.isnan(series.columns["macd"][MACD_SLOW - 1])
+
+    # A price that only rises has no losses
+    assert IndicatorSeries(np.arange(1.0, 40.0), window=5).columns["rsi"][-1] == 100.0
+
+
+@pytest.mark.parametrize("shape", [(120,), (120, 3)])
+def test_extended_matches_full_recompute(shape):
+    values = closes(shape[0]) if len(shape) == 1 else np.column_stack([closes(120, seed) for seed in range(3)])
+    extended = IndicatorSeries(values[:-1], window=20).extended(values[-1])
+    full = IndicatorSeries(values, window=20)
+
+    for name in INDICATORS:
+        np.testing.assert_allclose(extended.columns[name], full.columns[name], rtol=1e-9, equal_nan=True)
+
+
+def test_cache_hits_extends_and_misses():
+    cache = IndicatorCache()
+    values, days = closes(), dates()
+
+    first = cache.get("AAPL", days[:-1], values[:-1], 20)
+    assert cache.get("AAPL", days[:-1], values[:-1], 20) is first
+    extended = cache.get("AAPL", days, values, 20)
+    cache.get("AAPL", days[:-10], values[:-10], 20)
+
+    assert len(extended) == len(values)
+    assert cache.stats() == {"entries": 1, "hits": 1, "extends": 1, "misses": 2}
+
+
+def test_cache_recomputes_revised_history_with_the_same_dates():
+    cache = IndicatorCache()
+    values, days = closes(), dates()
+    cache.get("AAPL", days, values, 20)
+
+    # A split re-adjusts every close but keeps the dates
+    revised = cache.get("AAPL", days, values / 2, 20)
+
+    np.testing.assert_allclose(revised.closes, values / 2)
+    np.testing.assert_allclose(revised.columns["sma"], IndicatorSeries(values / 2, 20).columns["sma"], equal_nan=True)
+    assert cache.stats()["misses"] == 2
+
+    # Nor does a revised history plus a new bar extend the stale series
+    more_days = np.append(days, np.datetime64("2026-10-19"))
+    cache.get("AAPL", more_days, np.append(values, values[-1]), 20)
+    assert cache.stats() == {"entries": 1, "hits": 0, "extends": 0, "misses": 3}
+
+
+def test_cache_evicts_least_recently_used():
+    cache = IndicatorCache(max_entries=2)
+    values, days = closes(), dates()
+    for key in ("A", "B", "A", "C"):
+        cache.get(key, days, values, 20)
+
+    assert cache.stats()["entries"] == 2
+    cache.get("B", days, values, 20)
+    assert cache.stats()["misses"] == 4
@@ -0,0 +1,74 @@
+"""Registry rendering, and totals summed across worker processes through the shared file."""
+
+import multiprocessing
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from metrics import Registry  # noqa: E402
+
+
+def make_registry(path=None):
+    registry = Registry(path)
+    latency = registry.histogram("app_latency_seconds", "Latency.", "endpoint", buckets=(0.1, 1))
+    calls = registry.counter("app_calls_total", "Calls.", "source")
+    return registry, latency, calls
+
+
+def test_render_without_a_shared_file():
+    registry, latency, calls = make_registry()
+    latency.observe("search", 0.05)
+    latency.observe("search", 5)
+    calls.inc("meta", 2)
+
+    text = registry.render()
+
+    assert 'app_latency_seconds_bucket{endpoint="search",le="0.1"} 1' in text
+    assert 'app_latency_seconds_bucket{endpoint="search",le="+Inf"} 2' in text
+    assert 'app_latency_seconds_count{endpoint="search"} 2' in text
+    assert 'app_calls_total{source="meta"} 2' in text
+
+
+def work(path, count):
+    # A forked worker: record some calls and flush them before exiting
+    registry, latency, calls = make_registry(path)
+    for _ in range(count):
+        calls.inc("meta")
+        latency.observe("search", 0.5)
+    registry.flush()
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="uses fork")
+def test_totals_sum_across_processes_and_outlive_them(tmp_path):
+    path = str(tmp_path / "metrics.db")
+    context = multiprocessing.get_context("fork")
+    workers = [context.Process(target=work, args=(path, count)) for count in (3, 4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(10)
+        assert worker.exitcode == 0
+
+    registry, _, calls = make_registry(path)
+    calls.inc("meta")
+    text = registry.render()
+
+    assert 'app_calls_total{source="meta"} 8' in text
+    assert 'app_latency_seconds_bucket{endpoint="search",le="1"} 7' in text
+    assert 'app_latency_seconds_count{endpoint="search"} 7' in text
+
+    # Rendering again does not count this process twice
+    assert registry.render() == text
+
+    registry.reset()
+    assert 'app_calls_total{source="meta"} 1' in registry.render()
+
+
+def test_unusable_file_falls_back_to_this_process(tmp_path):
+    registry, _, calls = make_registry(str(tmp_path / "missing" / "metrics.db"))
+    calls.inc("meta", 5)
+
+    assert 'app_calls_total{source="meta"} 5' in registry.render()
@@ -0,0 +1,135 @@
+"""PriceStore: appends, full rewrites into a new generation, and readers racing them."""
+
+import json
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from price_store import PriceStore  # noqa: E402
+
+
+class Upstream:
+    """A fake price source whose history can be extended or revised."""
+
+    def __init__(self, days=30, end="2026-10-16"):
+        self.frame = self.bars(pd.bdate_range(end=end, periods=days), start=100.0)
+        self.full_fetches = 0
+
+    @staticmethod
+    def bars(dates, start):
+        close = start + np.arange(len(dates), dtype="float64")
+        return pd.DataFrame({"symbol": "AAPL", "report_date": dates, "open": close, "high": close,
+                             "low": close, "close": close, "volume": 1e6})
+
+    def fetch_full(self, ticker):
+        self.full_fetches += 1
+        return self.frame.copy()
+
+    def fetch_since(self, ticker, last_date):
+        return self.frame[self.frame["report_date"] >= last_date].copy()
+
+
+@pytest.fixture
+def upstream():
+    return Upstream()
+
+
+@pytest.fixture
+def store(tmp_path, upstream):
+    return PriceStore(str(tmp_path), upstream.fetch_full, upstream.fetch_since, max_age_seconds=3600)
+
+
+def expire(store, ticker="AAPL"):
+    # Age meta.json past max_age so the next load refreshes
+    path = os.path.join(store.root, ticker, "meta.json")
+    with open(path) as f:
+        meta = json.load(f)
+    meta["refreshed_at"] -= 2 * store.max_age_seconds
+    with open(path, "w") as f:
+        json.dump(meta, f)
+
+
+def test_load_reads_periods_and_ranges(store, upstream):
+    frame = store.load("AAPL")
+    assert frame["close"].tolist() == upstream.frame["close"].tolist()
+    assert len(store.load("AAPL", last=5)) == 5
+
+    dates = upstream.frame["report_date"]
+    window = store.load("AAPL", start=dates.iloc[10], end=dates.iloc[14])
+    assert window["report_date"].tolist() == dates.iloc[10:15].tolist()
+
+
+def test_refresh_appends_new_bars(store, upstream):
+    store.load("AAPL")
+    generation = store._read_meta("AAPL")["generation"]
+    upstream.frame = pd.concat([upstream.frame, Upstream.bars(pd.bdate_range("2026-10-19", periods=2), 130.0)])
+    expire(store)
+
+    frame = store.load("AAPL")
+
+    assert len(frame) == 32
+    assert frame["close"].iloc[-1] == 131.0
+    assert upstream.full_fetches == 1
+    assert store._read_meta("AAPL")["generation"] == generation
+
+
+def test_revised_history_is_rewritten_without_breaking_readers(store, upstream):
+    store.load("AAPL")
+    old_meta = store._read_meta("AAPL")
+
+    # A split halves every close and the upstream history is now shorter
+    upstream.frame = upstream.frame.tail(20).assign(close=lambda f: f["close"] / 2)
+    expire(store)
+    frame = store.load("AAPL")
+
+    assert upstream.full_fetches == 2
+    assert len(frame) == 20
+    assert frame["close"].tolist() == upstream.frame["close"].tolist()
+    assert store._read_meta("AAPL")["generation"] == old_meta["generation"] + 1
+
+    # A reader that read meta.json before the rewrite still gets the old,
+    # complete history rather than a truncated file
+    stale = store._read_frame("AAPL", old_meta)
+    assert len(stale) == 30
+    assert stale["close"].iloc[-1] == 129.0
+
+
+def test_rewrites_keep_only_the_previous_generation(store, upstream):
+    store.load("AAPL")
+    for _ in range(3):
+        upstream.frame = upstream.frame.assign(close=lambda f: f["close"] + 1)
+        expire(store)
+        store.load("AAPL")
+
+    generation = store._read_meta("AAPL")["generation"]
+    entries = sorted(e for e in os.listdir(os.path.join(store.root, "AAPL")) if e.startswith("v"))
+    assert entries == [f"v{generation - 1}", f"v{generation}"]
+
+
+def test_pre_generation_layout_is_still_readable(tmp_path, upstream):
+    # Columns in the ticker directory itself and no "generation" in meta.json
+    directory = tmp_path / "AAPL"
+    directory.mkdir()
+    frame = upstream.frame
+    dates = frame["report_date"].to_numpy().astype("datetime64[D]").astype("int64")
+    (directory / "report_date.bin").write_bytes(dates.tobytes())
+    for name in ("open", "high", "low", "close", "volume"):
+        (directory / f"{name}.bin").write_bytes(frame[name].to_numpy(dtype="float64").tobytes())
+    (directory / "meta.json").write_text(json.dumps({"rows": len(frame), "refreshed_at": 0}))
+
+    store = PriceStore(str(tmp_path), upstream.fetch_full, upstream.fetch_since)
+    loaded = store.load("AAPL")
+
+    assert loaded["close"].tolist() == frame["close"].tolist()
+    assert "generation" not in store._read_meta("AAPL")
+    assert upstream.full_fetches == 0
+
+
+def test_rejects_path_like_tickers(store):
+    with pytest.raises(ValueError):
+        store.load("../etc")
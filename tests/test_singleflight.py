@@ -0,0 +1,69 @@
+"""SingleFlight: coalescing concurrent calls, and not joining a call past max_age."""
+
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from singleflight import SingleFlight  # noqa: E402
+
+
+def start(target, *args):
+    thread = threading.Thread(target=target, args=args, daemon=True)
+    thread.start()
+    return thread
+
+
+def test_concurrent_callers_share_one_call():
+    flights = SingleFlight()
+    release = threading.Event()
+    calls, results = [], []
+
+    def fetch():
+        calls.append(1)
+        release.wait(5)
+        return "bars"
+
+    threads = [start(lambda: results.append(flights.do(("price", "AAPL"), fetch))) for _ in range(4)]
+    time.sleep(0.1)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert calls == [1]
+    assert results == ["bars"] * 4
+    assert flights.in_flight() == 0
+
+
+def test_errors_are_raised_and_not_kept():
+    flights = SingleFlight()
+
+    def fail():
+        raise RuntimeError("upstream down")
+
+    with pytest.raises(RuntimeError):
+        flights.do(("price", "AAPL"), fail)
+    assert flights.in_flight() == 0
+
+
+def test_hung_call_is_not_joined_past_max_age():
+    flights = SingleFlight(max_age=0.2)
+    hung = threading.Event()
+    start(flights.do, ("quote", "AAPL"), hung.wait, 10)
+    time.sleep(0.05)
+
+    # A caller that joined the hung call gives up on it at max_age and runs
+    # its own; later callers never join the hung call at all
+    started = time.monotonic()
+    assert flights.do(("quote", "AAPL"), lambda: "fresh") == "fresh"
+    assert time.monotonic() - started < 1
+    assert flights.do(("quote", "AAPL"), lambda: "again") == "again"
+
+    # The hung call finishing later does not drop a newer call's entry
+    hung.set()
+    time.sleep(0.05)
+    assert flights.in_flight() == 0
@@ -0,0 +1,145 @@
+"""TiingoClient against a local stub server: keep-alive, retries and the quota."""
+
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import tiingo_client  # noqa: E402
+from tiingo_client import SharedRateLimiter, TiingoClient, TiingoRateLimited  # noqa: E402
+
+
+class StubTiingo:
+    """Serves queued (status, headers) responses, then 200s, recording each request."""
+
+    def __init__(self):
+        self.responses = []
+        self.requests = []  # (client port, path, Authorization header)
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive
+
+            def do_GET(self):
+                stub.requests.append((self.client_address[1], self.path, self.headers.get("Authorization")))
+                status, headers = stub.responses.pop(0) if stub.responses else (200, {})
+                body = b'{"ticker": "AAPL"}'
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}/tiingo/daily/AAPL"
+        threading.Thread(target=self.server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def stub():
+    server = StubTiingo()
+    yield server
+    server.close()
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    # Record backoff sleeps instead of waiting them out
+    recorded = []
+    monkeypatch.setattr(tiingo_client.time, "sleep", recorded.append)
+    return recorded
+
+
+def make_client(**kwargs):
+    options = {"requests_per_hour": 100, "requests_per_day": 1000, "max_retries": 2}
+    options.update(kwargs)
+    return TiingoClient("test-key", **options)
+
+
+def test_requests_reuse_one_connection(stub):
+    client = make_client()
+    for _ in range(3):
+        assert client.get(stub.url).status_code == 200
+
+    ports = {port for port, _, _ in stub.requests}
+    assert len(stub.requests) == 3
+    assert len(ports) == 1
+    # The key travels in a header, never in the URL
+    assert all(auth == "Token test-key" and "test-key" not in path for _, path, auth in stub.requests)
+
+
+@pytest.mark.parametrize("status", [503, 429])
+def test_retries_honour_retry_after(stub, sleeps, status):
+    stub.responses = [(status, {"Retry-After": "3"})]
+    client = make_client()
+
+    response = client.get(stub.url)
+
+    assert response.status_code == 200
+    assert len(stub.requests) == 2
+    assert sleeps == [3.0]
+
+
+def test_retry_after_is_capped_and_retries_stop(stub, sleeps):
+    stub.responses = [(503, {"Retry-After": "120"})] * 3
+    client = make_client(max_retries=2, backoff_cap=8)
+
+    response = client.get(stub.url)
+
+    # The last attempt's error response is returned as-is
+    assert response.status_code == 503
+    assert len(stub.requests) == 3
+    assert sleeps == [8, 8]
+
+
+def test_quota_exhaustion_raises_without_calling_upstream(stub):
+    client = make_client(requests_per_hour=2, max_quota_wait=0)
+    client.get(stub.url)
+    client.get(stub.url)
+
+    with pytest.raises(TiingoRateLimited):
+        client.get(stub.url)
+    assert len(stub.requests) == 2
+
+
+def test_shared_quota_spans_clients_and_restarts(stub, tmp_path):
+    path = str(tmp_path / "quota.db")
+    first = make_client(requests_per_hour=3, max_quota_wait=0, quota_path=path)
+    second = make_client(requests_per_hour=3, max_quota_wait=0, quota_path=path)
+
+    first.get(stub.url)
+    second.get(stub.url)
+    first.get(stub.url)
+    with pytest.raises(TiingoRateLimited):
+        second.get(stub.url)
+
+    # A new process starts from the stored levels, not a full bucket
+    restarted = make_client(requests_per_hour=3, max_quota_wait=0, quota_path=path)
+    with pytest.raises(TiingoRateLimited):
+        restarted.get(stub.url)
+    assert len(stub.requests) == 3
+
+
+def test_shared_limiter_waits_for_refill(tmp_path):
+    limiter = SharedRateLimiter(str(tmp_path / "quota.db"), [("burst", 1, 0.2)])
+    limiter.acquire(0)
+    with pytest.raises(TiingoRateLimited):
+        limiter.acquire(0)
+    # Within max_wait it sleeps until the next token is due instead of failing
+    started = time.monotonic()
+    limiter.acquire(5)
+    assert 0 < time.monotonic() - started < 1
@@ -0,0 +1,209 @@
+"""Pooled, rate-limit-aware HTTP client for the Tiingo REST API."""
+
+import logging
+import random
+import sqlite3
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class TiingoRateLimited(Exception):
+    """Raised when the local quota would be exceeded before the wait limit."""
+
+
+class TokenBucket:
+    """Token bucket refilling ``capacity`` tokens evenly over ``period`` seconds."""
+
+    def __init__(self, capacity, period, now=None):
+        self.capacity = capacity
+        self.rate = capacity / period
+        self.tokens = float(capacity)
+        self.updated = time.monotonic() if now is None else now
+
+    def refill(self, now):
+        # A clock that stepped backwards adds nothing rather than draining tokens
+        self.tokens = min(self.capacity, self.tokens + max(now - self.updated, 0) * self.rate)
+        self.updated = now
+
+    def wait_time(self):
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+
+class RateLimiter:
+    """Admits a request only when every bucket (e.g. hourly and daily) has a token."""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+
+    def acquire(self, max_wait):
+        deadline = time.monotonic() + max_wait
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                for bucket in self.buckets:
+                    bucket.refill(now)
+                wait = max(bucket.wait_time() for bucket in self.buckets)
+                if wait == 0:
+                    for bucket in self.buckets:
+                        bucket.tokens -= 1
+                    return
+            if now + wait > deadline:
+                raise TiingoRateLimited(f"Tiingo quota exhausted; next request in {wait:.1f}s")
+            time.sleep(wait)
+
+
+class SharedRateLimiter:
+    """``RateLimiter`` whose buckets live in a SQLite (WAL) file shared by every process.
+
+    All gunicorn workers on a node open the same file, so together they stay
+    within one account quota, and a restart resumes from the stored levels
+    instead of a full bucket. Each acquire refills and debits the buckets in
+    a single write transaction; bucket times are wall-clock seconds since
+    they are compared across processes. ``limits`` is a list of
+    ``(name, capacity, period_seconds)``.
+
+    If the database cannot be used, requests are limited by per-process
+    buckets instead, so a broken file never blocks upstream calls.
+    """
+
+    def __init__(self, path, limits, busy_timeout=5):
+        self.path = path
+        self.limits = limits
+        self.busy_timeout = busy_timeout
+        self.fallback = RateLimiter([TokenBucket(capacity, period) for _, capacity, period in limits])
+        self._local = threading.local()
+
+    def acquire(self, max_wait):
+        deadline = time.time() + max_wait
+        while True:
+            try:
+                wait = self._take(time.time())
+            except sqlite3.Error as e:
+                logger.warning("shared Tiingo quota unavailable path=%s error=%r; using local buckets", self.path, e)
+                return self.fallback.acquire(max(deadline - time.time(), 0))
+            if wait == 0:
+                return
+            if time.time() + wait > deadline:
+                raise TiingoRateLimited(f"Tiingo quota exhausted; next request in {wait:.1f}s")
+            time.sleep(wait)
+
+    def _take(self, now):
+        # Seconds until every bucket has a token; 0 means one was taken from each
+        conn = self._conn()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            stored = {name: (tokens, updated) for name, tokens, updated in
+                      conn.execute('SELECT name, tokens, updated FROM quota_buckets')}
+            buckets = []
+            for name, capacity, period in self.limits:
+                bucket = TokenBucket(capacity, period, now=now)
+                if name in stored:
+                    bucket.tokens, bucket.updated = stored[name]
+                bucket.refill(now)
+                buckets.append((name, bucket))
+
+            wait = max(bucket.wait_time() for _, bucket in buckets)
+            if wait == 0:
+                for _, bucket in buckets:
+                    bucket.tokens -= 1
+            conn.executemany(
+                'INSERT OR REPLACE INTO quota_buckets (name, tokens, updated) VALUES (?, ?, ?)',
+                [(name, bucket.tokens, bucket.updated) for name, bucket in buckets]
+            )
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        return wait
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # Transactions are explicit (BEGIN IMMEDIATE), hence autocommit mode
+            conn = sqlite3.connect(self.path, timeout=self.busy_timeout, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS quota_buckets (
+                    name TEXT PRIMARY KEY,
+                    tokens REAL NOT NULL,
+                    updated REAL NOT NULL
+                )
+            ''')
+            self._local.conn = conn
+        return conn
+
+
+class TiingoClient:
+    """Keep-alive session with explicit timeouts, a local quota and retries.
+
+    Requests are authenticated with the ``Authorization`` header so the API
+    key never appears in URLs or logs. Responses with a status in
+    ``RETRY_STATUSES`` and connection errors are retried with full-jitter
+    exponential backoff, honouring ``Retry-After`` when Tiingo sends one.
+    With ``quota_path`` the quota is kept in that SQLite file and shared by
+    every process using it; without it each process has its own buckets.
+    """
+
+    def __init__(self, api_key, requests_per_hour, requests_per_day,
+                 connect_timeout=3.05, read_timeout=10, max_retries=3,
+                 backoff_base=0.5, backoff_cap=8, max_quota_wait=2, pool_size=32,
+                 quota_path=None):
+        self.api_key = api_key
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.max_quota_wait = max_quota_wait
+        if quota_path is not None:
+            self.limiter = SharedRateLimiter(quota_path, [
+                ("hour", requests_per_hour, 60 * 60),
+                ("day", requests_per_day, 24 * 60 * 60),
+            ])
+        else:
+            self.limiter = RateLimiter([
+                TokenBucket(requests_per_hour, 60 * 60),
+                TokenBucket(requests_per_day, 24 * 60 * 60),
+            ])
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({
+            "Authorization": f"Token {api_key}",
+            "Content-Type": "application/json",
+        })
+
+    def get(self, url, params=None, read_timeout=None):
+        timeout = (self.connect_timeout, read_timeout or self.read_timeout)
+        for attempt in range(self.max_retries + 1):
+            self.limiter.acquire(self.max_quota_wait)
+            try:
+                response = self.session.get(url, params=params, timeout=timeout)
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt == self.max_retries:
+                    raise
+                time.sleep(self._backoff(attempt))
+                continue
+
+            if response.status_code not in RETRY_STATUSES or attempt == self.max_retries:
+                return response
+            time.sleep(self._backoff(attempt, response.headers.get("Retry-After")))
+        return response
+
+    def _backoff(self, attempt, retry_after=None):
+        if retry_after is not None:
+            try:
+                return min(float(retry_after), self.backoff_cap)
+            except ValueError:
+                pass
+        return random.uniform(0, min(self.backoff_cap, self.backoff_base * 2 ** attempt))